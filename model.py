@@ -1,5 +1,41 @@
+from math import exp, sqrt
+
 import numpy as np
 from scipy.integrate import solve_ivp
+from scipy.optimize import OptimizeResult
+
+
+def _soc_depleted(t, y, *args):
+    """
+    积分终止事件：SOC下降至 1e-6
+    阈值取略大于0，隐式求解器在 SOC<=0 的间断面前会无限缩小步长而无法越过
+    """
+    return y[0] - 1e-6
+
+_soc_depleted.terminal = True
+_soc_depleted.direction = -1
+
+# OCV查找表：与 SmartphoneBatteryModel.V_oc 相同的曲线，用于由电压反查SOC
+_SOC_GRID = np.linspace(0, 1, 10001)
+_VOC_LUT = ((0.3*_SOC_GRID - 0.4)*_SOC_GRID + 1.05)*_SOC_GRID + 3.39
+
+
+def _crossing_time(t, x, level):
+    """
+    单调不增序列 x 首次降至 level 的时刻（线性插值），未越过时返回 None
+    """
+    n = len(t)
+    i = n - np.searchsorted(x[::-1], level, side='right')
+    if i >= n:
+        return None
+    if i == 0:
+        return t[0]
+    
+    x_before = x[i-1]
+    x_after = x[i]
+    if abs(x_after - x_before) > 1e-10:
+        return t[i-1] + (level - x_before) / (x_after - x_before) * (t[i] - t[i-1])
+    return t[i]
 
 class SmartphoneBatteryModel:
     def __init__(self):
@@ -47,13 +83,14 @@ class SmartphoneBatteryModel:
         #self.P_screen_max = 0.6   # 屏幕最大功耗 (W)
         
     def V_oc(self, SOC):
-        """开路电压曲线 (OCV-SOC关系)"""
+        """开路电压曲线 (OCV-SOC关系)，支持标量或数组输入"""
         #SOC_safe = np.clip(SOC, 0.0, 1.0)
-        return 3.39 + 1.05*SOC - 0.4*SOC**2 + 0.3*SOC**3
+        # 3.39 + 1.05*SOC - 0.4*SOC^2 + 0.3*SOC^3 的Horner形式，数组输入时少产生临时数组
+        return ((0.3*SOC - 0.4)*SOC + 1.05)*SOC + 3.39
     
     def get_RC_params(self, SOC, T):
         """
-        获取二阶RC参数（随SOC和温度变化）
+        获取二阶RC参数（随SOC和温度变化），支持标量或数组输入
         返回: R0, R1, R2 (考虑温度和SOC影响)
         """
         #SOC = np.clip(SOC, 0.05, 1.0)
@@ -64,10 +101,11 @@ class SmartphoneBatteryModel:
         # SOC影响因子（SOC越低，内阻越大）
         SOC_effect = 1 + 0.5 * (1 - SOC)
         
-        # 各电阻随SOC和温度变化
-        R0 = self.R0 * SOC_effect * T_effect
-        R1 = self.R1 * SOC_effect * T_effect
-        R2 = self.R2 * SOC_effect * T_effect
+        # 各电阻随SOC和温度变化（三者共用同一缩放因子）
+        RC_scale = SOC_effect * T_effect
+        R0 = self.R0 * RC_scale
+        R1 = self.R1 * RC_scale
+        R2 = self.R2 * RC_scale
         
         return R0, R1, R2
     
@@ -84,29 +122,28 @@ class SmartphoneBatteryModel:
         return self.Q0 * self.f_T(T) * self.f_aging(t)
     
     def component_power(self, t, scenario):
-        """计算各组件功耗"""
-        power = self.P_base
-        
-        # 屏幕功耗
-        if 'screen_on' in scenario:
-            if scenario['screen_on'] ==True:
-              brightness = scenario.get('brightness', 0.5)
-              power += self.P_a *brightness*self.P_refresh*self.P_screen_square
-        
-        # CPU功耗
-        if 'cpu_usage' in scenario:
-            cpu_usage = scenario['cpu_usage']
-            power += self.P_cpu_idle + cpu_usage*self.P_cpu_B*(self.P_cpu_f**2)
-        
-        # 网络功耗
-        if 'data_rate' in scenario:
-            data_rate = scenario['data_rate']
-            power += self.P_net_idle + self.beta * data_rate
-        
-        # GPS功耗
-        if 'gps_on' in scenario:
-            if scenario['gps_on']==True:
-               power += self.P_gps
+        """
+        计算各组件功耗
+        开关量 (screen_on / gps_on) 直接作为0/1系数参与运算，不再逐项分支；
+        场景中未给出的组件 (无 cpu_usage / data_rate 键) 不计功耗；
+        场景值可为标量，也可为数组（见 scenery.scenario_table），此时返回逐点功耗数组
+        """
+        get = scenario.get
+        
+        power = (
+            self.P_base
+            # 屏幕功耗
+            + get('screen_on', False) * get('brightness', 0.5)
+              * (self.P_a * self.P_refresh * self.P_screen_square)
+            # CPU功耗
+            + ('cpu_usage' in scenario)
+              * (self.P_cpu_idle + get('cpu_usage', 0.0) * self.P_cpu_B * (self.P_cpu_f * self.P_cpu_f))
+            # 网络功耗
+            + ('data_rate' in scenario)
+              * (self.P_net_idle + self.beta * get('data_rate', 0.0))
+            # GPS功耗
+            + get('gps_on', False) * self.P_gps
+        )
         
         return power
     
@@ -129,21 +166,29 @@ class SmartphoneBatteryModel:
         b = -V_eff
         c = P_total
         
-        delta = b**2 - 4*a*c
+        delta = b*b - 4*a*c
         
-        if delta < 0:
-            # 无实解，功率需求过大
-            I = V_eff / (2 * R0)
-        else:
-            # 取较小的正根
-            I = (-b - np.sqrt(delta)) / (2 * a)
+        # 取较小的正根；delta<0（无实解，功率需求过大）时判别式按0处理，
+        # 即 I = V_eff/(2*R0)，与原分支结果相同
+        I = (-b - sqrt(max(delta, 0.0))) / (2 * a)
         
         # 限制电流范围 (0-5A)
-        I = np.clip(I, 0, 5.0)
+        I = min(max(I, 0.0), 5.0)
         
         return I
     
-    def model_equations(self, t, y, scenario_func):
+    def solve_current_vec(self, P_total, V_oc, U1, U2, R0):
+        """
+        solve_current 的数组版本，输入为同形数组（或可广播的标量）
+        防护条件与限幅用 np.where / np.clip 逐元素处理，结果与标量版一致
+        """
+        V_eff = V_oc - U1 - U2
+        delta = V_eff*V_eff - 4*R0*P_total
+        I = (V_eff - np.sqrt(np.maximum(delta, 0.0))) / (2 * R0)
+        
+        return np.where((V_eff <= 0.1) | (P_total <= 0) | (R0 <= 0), 0.0, np.clip(I, 0.0, 5.0))
+    
+    def model_equations(self, t, y, scenario_func, P_total=None):
         """
         改进的微分方程组（二阶RC模型）
         y = [SOC, T_batt, U1, U2]
@@ -151,6 +196,7 @@ class SmartphoneBatteryModel:
         T_batt: 电池温度
         U1: 电化学极化电压
         U2: 浓度极化电压
+        P_total: 场景与时间无关时由 simulate 预先算好的总功耗，None 则逐步计算
         """
         SOC, T_batt, U1, U2 = y
         
@@ -162,22 +208,36 @@ class SmartphoneBatteryModel:
         scenario = scenario_func(t)
         
         # 计算总功耗
-        P_total = self.component_power(t, scenario)
+        if P_total is None:
+            P_total = self.component_power(t, scenario)
+        
+        # 以下内联展开 V_oc / get_RC_params / solve_current / Q_eff，
+        # 省去每个积分步的多次方法调用（修改公式时需与对应方法同步）
         
         # 计算开路电压
-        V_oc = self.V_oc(SOC)
+        V_oc = ((0.3*SOC - 0.4)*SOC + 1.05)*SOC + 3.39
         
         # 获取RC参数（随SOC和温度变化）
-        R0, R1, R2 = self.get_RC_params(SOC, T_batt)
+        RC_scale = (1 + 0.5 * (1 - SOC)) * exp(0.01*(1/T_batt - 1/self.T_ref))
+        R0 = self.R0 * RC_scale
+        R1 = self.R1 * RC_scale
+        R2 = self.R2 * RC_scale
         
         # 求解电流 (单位: A)
-        I_A = self.solve_current(P_total, V_oc, U1, U2, R0)
+        V_eff = V_oc - U1 - U2
+        if V_eff <= 0.1 or P_total <= 0 or R0 <= 0:
+            I_A = 0.0
+        else:
+            delta = V_eff*V_eff - 4*R0*P_total
+            I_A = (V_eff - sqrt(max(delta, 0.0))) / (2 * R0)
+            I_A = min(max(I_A, 0.0), 5.0)
         
         # 转换为mA用于SOC计算
         I_mA = I_A * 1000
         
         # 有效容量
-        Q_eff = self.Q_eff(T_batt, t)
+        Q_eff = (self.Q0 * exp(self.Ea/self.R_gas * (1/self.T_ref - 1/T_batt))
+                 * sqrt(1 - self.k_aging * t))
         
         # 1. SOC变化率 (1/s)
         dSOC_dt = -I_mA / (Q_eff * 3600)
@@ -193,30 +253,196 @@ class SmartphoneBatteryModel:
         # 4. 温度变化率 (K/s)
         # 总热损耗 = I^2 * (R0 + R1 + R2)
         R_total = R0 + R1 + R2
-        P_heat = I_A**2 * R_total
+        P_heat = I_A*I_A * R_total
         P_cool = self.h * self.A * (T_batt - scenario.get('T_amb', 298.15))
         dT_dt = (P_heat - P_cool) / self.C_th
         
         return [dSOC_dt, dT_dt, dU1_dt, dU2_dt]
     
-    def simulate(self, t_span, y0, scenario_func, max_step=1.0):
-        """模拟电池放电"""
+    def jacobian(self, t, y, scenario_func, P_total=None):
+        """
+        微分方程组的解析雅可比矩阵 J[i, j] = d(dy_i/dt)/dy_j
+        供刚性求解器 (LSODA / BDF / Radau) 使用，免去有限差分估计雅可比
+        电流I由二次方程解出，其偏导用隐函数求导；电流被限幅的区间内I视为常数
+        """
+        SOC, T_batt, U1, U2 = y
+        
+        if SOC <= 0:
+            return np.zeros((4, 4))
+        
+        scenario = scenario_func(t)
+        if P_total is None:
+            P_total = self.component_power(t, scenario)
+        
+        # 开路电压及其对SOC的导数
+        V_oc = ((0.3*SOC - 0.4)*SOC + 1.05)*SOC + 3.39
+        dVoc_dSOC = (0.9*SOC - 0.8)*SOC + 1.05
+        
+        # RC参数缩放因子及其偏导
+        T_effect = exp(0.01*(1/T_batt - 1/self.T_ref))
+        RC_scale = (1 + 0.5 * (1 - SOC)) * T_effect
+        dscale_dSOC = -0.5 * T_effect
+        dscale_dT = -0.01 / (T_batt*T_batt) * RC_scale
+        R0 = self.R0 * RC_scale
+        R1 = self.R1 * RC_scale
+        R2 = self.R2 * RC_scale
+        
+        # 电流及其对有效电压V_eff、欧姆内阻R0的偏导
+        V_eff = V_oc - U1 - U2
+        dI_dV = 0.0
+        dI_dR0 = 0.0
+        if V_eff <= 0.1 or P_total <= 0 or R0 <= 0:
+            I_A = 0.0
+        else:
+            delta = V_eff*V_eff - 4*R0*P_total
+            if delta <= 0:
+                I_A = V_eff / (2 * R0)
+                dI_dV = 1 / (2 * R0)
+                dI_dR0 = -I_A / R0
+            else:
+                sqrt_delta = sqrt(delta)
+                I_A = (V_eff - sqrt_delta) / (2 * R0)
+                dI_dV = (1 - V_eff / sqrt_delta) / (2 * R0)
+                dI_dR0 = P_total / (R0 * sqrt_delta) - I_A / R0
+            if I_A < 0 or I_A > 5.0:
+                I_A = min(max(I_A, 0.0), 5.0)
+                dI_dV = 0.0
+                dI_dR0 = 0.0
+        
+        # 电流对各状态量的偏导
+        dI_dSOC = dI_dV * dVoc_dSOC + dI_dR0 * self.R0 * dscale_dSOC
+        dI_dT = dI_dR0 * self.R0 * dscale_dT
+        dI_dU = -dI_dV
+        
+        # 1. SOC: dSOC/dt = -1000*I / (3600*Q_eff)，Q_eff随温度变化
+        Q_eff = (self.Q0 * exp(self.Ea/self.R_gas * (1/self.T_ref - 1/T_batt))
+                 * sqrt(1 - self.k_aging * t))
+        k_soc = -1000 / (3600 * Q_eff)
+        dQ_dT_rel = self.Ea / (self.R_gas * (T_batt*T_batt))
+        
+        # 2./3. 极化电压: dU/dt = I/C - U/(R*C)
+        tau1 = R1 * self.C1
+        tau2 = R2 * self.C2
+        dinvtau1 = U1 / (tau1 * R1)
+        dinvtau2 = U2 / (tau2 * R2)
+        
+        # 4. 温度: dT/dt = (I^2*R_total - h*A*(T - T_amb)) / C_th
+        R_base = self.R0 + self.R1 + self.R2
+        R_total = R_base * RC_scale
+        k_heat = 2 * I_A * R_total / self.C_th
+        I2_C = I_A*I_A / self.C_th
+        
+        J = np.array([
+            [k_soc * dI_dSOC,
+             k_soc * (dI_dT - I_A * dQ_dT_rel),
+             k_soc * dI_dU,
+             k_soc * dI_dU],
+            [k_heat * dI_dSOC + I2_C * R_base * dscale_dSOC,
+             k_heat * dI_dT + I2_C * R_base * dscale_dT - self.h * self.A / self.C_th,
+             k_heat * dI_dU,
+             k_heat * dI_dU],
+            [dI_dSOC / self.C1 + dinvtau1 * self.R1 * dscale_dSOC,
+             dI_dT / self.C1 + dinvtau1 * self.R1 * dscale_dT,
+             dI_dU / self.C1 - 1 / tau1,
+             dI_dU / self.C1],
+            [dI_dSOC / self.C2 + dinvtau2 * self.R2 * dscale_dSOC,
+             dI_dT / self.C2 + dinvtau2 * self.R2 * dscale_dT,
+             dI_dU / self.C2,
+             dI_dU / self.C2 - 1 / tau2],
+        ])
+        
+        return J
+    
+    def _fixed_scenario(self, scenario_func, t0):
+        """
+        与时间无关的场景（scenery.time_invariant）在整次仿真中场景字典和总功耗都不变：
+        只构建一次场景字典、计算一次总功耗，返回 (直接返回该字典的场景函数, P_total)；
+        其他场景原样返回，P_total 为 None（由右端项逐步计算）
+        """
+        if not getattr(scenario_func, 'time_invariant', False):
+            return scenario_func, None
+        scenario = scenario_func(t0)
+        return (lambda t: scenario), self.component_power(t0, scenario)
+    
+    def simulate(self, t_span, y0, scenario_func, max_step=1.0, method='LSODA',
+                 dense_output=False):
+        """
+        模拟电池放电
+        
+        method 为 'LSODA' / 'BDF' / 'Radau' 等隐式(刚性)求解器时，
+        自动传入解析雅可比矩阵，避免求解器用有限差分重复估计
+        dense_output=True 时 sol.sol(t) 可在任意时刻（至SOC耗尽）求值，
+        绘图无需缩小 max_step 或另做插值
+        """
         t_start,t_end=t_span
-        t_eval=np.arange(t_start,t_end+max_step,max_step)
+        # 以 max_step 为间隔的输出网格，末点恰为 t_end（t_end 不必是 max_step 的整数倍）
+        t_eval=np.append(np.arange(t_start,t_end,max_step),t_end)
+        
+        options = {}
+        if method in ('LSODA', 'BDF', 'Radau'):
+            options['jac'] = self.jacobian
         
+        scenario_func, P_total = self._fixed_scenario(scenario_func, t_start)
+        
+        # scenario_func 经 args 直接传给右端项/雅可比/事件函数，省去每次调用的lambda跳板
         sol = solve_ivp(
-            lambda t, y: self.model_equations(t, y, scenario_func),
+            self.model_equations,
             t_span,
             y0,
-            method='RK45',
+            method=method,
+            args=(scenario_func, P_total),
             t_eval=t_eval,
-            dense_output=False,
+            dense_output=dense_output,
             max_step=max_step,
             rtol=1e-6,
-            atol=1e-9
+            atol=1e-9,
+            events=_soc_depleted,
+            **options
         )
+        
+        # SOC耗尽后右端项恒为零、状态冻结：积分在SOC耗尽时终止，
+        # 其余输出点直接用耗尽时刻的状态补齐
+        if sol.status == 1:
+            t_rest = t_eval[t_eval > sol.t_events[0][-1]]
+            y_end = sol.y_events[0][-1]
+            sol.t = np.concatenate([sol.t, t_rest])
+            sol.y = np.hstack([sol.y, np.repeat(y_end[:, None], len(t_rest), axis=1)])
         return sol
     
+    def simulate_fixed_step(self, t_span, y0, scenario_func, dt=8.0):
+        """
+        定步长四阶龙格-库塔模拟（预分配时间网格）
+        
+        适用于需要均匀、稠密输出网格的绘图场景，省去自适应步长的误差估计开销。
+        显式RK4的稳定性要求 dt < 2.78*tau，极化时间常数 tau1 约8秒，
+        因此 dt 不宜超过10秒左右。
+        
+        返回:
+            与 solve_ivp 结果相同的 t / y 属性，可直接传给 find_empty_time
+        """
+        t_start, t_end = t_span
+        n_steps = int(round((t_end - t_start) / dt))
+        t = t_start + dt * np.arange(n_steps + 1)
+        
+        y = np.empty((len(y0), n_steps + 1))
+        y[:, 0] = y0
+        
+        scenario_func, P_total = self._fixed_scenario(scenario_func, t_start)
+        
+        f = self.model_equations
+        half = 0.5 * dt
+        for i in range(n_steps):
+            ti = t[i]
+            yi = y[:, i]
+            k1 = np.asarray(f(ti, yi, scenario_func, P_total))
+            k2 = np.asarray(f(ti + half, yi + half * k1, scenario_func, P_total))
+            k3 = np.asarray(f(ti + half, yi + half * k2, scenario_func, P_total))
+            k4 = np.asarray(f(ti + dt, yi + dt * k3, scenario_func, P_total))
+            y[:, i + 1] = yi + dt / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+        
+        return OptimizeResult(t=t, y=y, nfev=4 * n_steps, status=0,
+                              message='Fixed-step RK4 completed.', success=True)
+    
     def find_empty_time(self, sol, V_cutoff=2.5, SOC_min=0.05):
         """
         找到电池放空时间（优化版）
@@ -235,52 +461,25 @@ class SmartphoneBatteryModel:
         3. 取两种条件中较早触发的时间
         """
         SOC = sol.y[0]
-        T_batt = sol.y[1]
-        U1 = sol.y[2]
-        U2 = sol.y[3]
         t = sol.t
         
-        # 方法1: 检查SOC是否低于阈值（带插值）
-        idx_soc = np.where(SOC <= SOC_min)[0]
-        t_soc_empty = None
-        
-        if len(idx_soc) > 0:
-            i = idx_soc[0]
-            if i > 0:
-                # 线性插值找到精确的SOC=SOC_min时刻
-                soc_before = SOC[i-1]
-                soc_after = SOC[i]
-                t_before = t[i-1]
-                t_after = t[i]
-                
-                # 插值公式
-                if abs(soc_after - soc_before) > 1e-10:
-                    t_soc_empty = t_before + (SOC_min - soc_before) / (soc_after - soc_before) * (t_after - t_before)
-                else:
-                    t_soc_empty = t[i]
-            else:
-                t_soc_empty = t[i]
+        # V_oc随SOC单调递增，V_oc低于截止电压等价于SOC低于对应的截止SOC，
+        # 用预计算的OCV查找表反查一次即可，无需对整条轨迹计算V_oc
+        SOC_cutoff = None
+        if V_cutoff >= _VOC_LUT[0]:
+            SOC_cutoff = np.interp(V_cutoff, _VOC_LUT, _SOC_GRID)
+        
+        # SOC放电过程中单调不增：末端SOC仍高于两个阈值时不会触发任何停止条件
+        if SOC[-1] > SOC_min and (SOC_cutoff is None or SOC[-1] > SOC_cutoff):
+            return t[-1]
+        
+        # 方法1: 检查SOC是否低于阈值（带插值，逆序视图上二分查找）
+        t_soc_empty = _crossing_time(t, SOC, SOC_min)
         
         # 方法2: 检查开路电压（简化版，不考虑负载）
         t_voltage_cutoff = None
-        V_oc_array = np.array([self.V_oc(soc) for soc in SOC])
-        
-        idx_voltage = np.where(V_oc_array <= V_cutoff)[0]
-        if len(idx_voltage) > 0:
-            i = idx_voltage[0]
-            if i > 0:
-                # 线性插值
-                v_before = V_oc_array[i-1]
-                v_after = V_oc_array[i]
-                t_before = t[i-1]
-                t_after = t[i]
-                
-                if abs(v_after - v_before) > 1e-10:
-                    t_voltage_cutoff = t_before + (V_cutoff - v_before) / (v_after - v_before) * (t_after - t_before)
-                else:
-                    t_voltage_cutoff = t[i]
-            else:
-                t_voltage_cutoff = t[i]
+        if SOC_cutoff is not None:
+            t_voltage_cutoff = _crossing_time(t, SOC, SOC_cutoff)
         
         # 取两种方法中较早的时间（更保守）
         empty_times = [t for t in [t_soc_empty, t_voltage_cutoff] if t is not None]
@@ -1,8 +1,14 @@
 # 使用场景定义函数
 import numpy as np
 
-def scenario_video_streaming(t):
-    """视频流场景 - 使用阶跃式突变模拟真实使用变化"""
+def time_invariant(scenario_func):
+    """标记不随时间变化的场景：模型仿真时组件功耗只需计算一次"""
+    scenario_func.time_invariant = True
+    return scenario_func
+
+@time_invariant
+def scenario_video_streaming(t, T_amb=298.15):
+    """视频流场景 - 使用阶跃式突变模拟真实使用变化；T_amb 为环境温度 (K)"""
     # 基础参数
     brightness = 0.7
     cpu_usage = 0.3
@@ -14,10 +20,11 @@ def scenario_video_streaming(t):
         'cpu_usage': cpu_usage,
         'data_rate': data_rate,
         'gps_on': False,
-        'T_amb': 298.15  # 25°C
+        'T_amb': T_amb  # 默认25°C
     }
     return scenario
 
+@time_invariant
 def scenario_gaming(t):
     """游戏场景"""
     scenario = {
@@ -30,6 +37,7 @@ def scenario_gaming(t):
     }
     return scenario
 
+@time_invariant
 def scenario_navigation(t):
     """导航场景"""
     scenario = {
@@ -41,6 +49,7 @@ def scenario_navigation(t):
         'T_amb': 298.15
     }
     return scenario
+@time_invariant
 def scenario_free(t):
     """空闲场景"""
     scenario = {
@@ -52,8 +61,26 @@ def scenario_free(t):
         'T_amb': 298.15
     }
     return scenario
+@time_invariant
 def scenario_cold_weather(t):
     """低温场景"""
-    scenario = scenario_video_streaming(t)
-    scenario['T_amb'] = 273.15  # -10°C
-    return scenario
+    return scenario_video_streaming(t, T_amb=273.15)  # -10°C
+
+
+def scenario_table(scenario_func, t):
+    """
+    在时间数组 t 上对场景求值一次，按键整理成数组字典（每个键对应与 t 同长的数组），
+    可直接传给 SmartphoneBatteryModel.component_power 做向量化功耗计算
+    """
+    samples = [scenario_func(ti) for ti in t]
+    return {key: np.array([s[key] for s in samples]) for key in samples[0]}
+
+
+# 场景分发表：名称 -> 场景函数（问题2各分析脚本共用）
+SCENARIOS = {
+    'Video Streaming': scenario_video_streaming,
+    'Gaming': scenario_gaming,
+    'Navigation': scenario_navigation,
+    'Idle': scenario_free,
+    'Cold Weather': scenario_cold_weather
+}
@@ -1,7 +1,10 @@
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # 仅保存图片，不需要交互式后端
 import matplotlib.pyplot as plt
 import pandas as pd
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 project_root = Path(__file__).resolve().parents[1]  # 父目录的上级是 MCMA
 sys.path.insert(0, str(project_root))
@@ -12,11 +15,22 @@ from scenery import *
 plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'KaiTi', 'SimSun']
 plt.rcParams['axes.unicode_minus'] = False
 
-def simulate_discharge_times():
-    """模拟不同SOC初始量下的放电时间"""
-    # 初始化模型
+def _simulate_one(task):
+    """子进程任务：单个(初始SOC, 场景)组合的放电时间 (小时)"""
+    soc, scenario_func, t_span, T_init = task
     battery = SmartphoneBatteryModel()
     
+    # 初始状态: [SOC, T_batt, U1, U2]
+    y0 = [soc, T_init, 0.0, 0.0]
+    
+    # 运行仿真（LSODA + 解析雅可比，60秒输出网格足以定位放空时刻）
+    sol = battery.simulate(t_span, y0, scenario_func, max_step=60, method='LSODA')
+    
+    # 计算放电时间
+    return battery.find_empty_time(sol) / 3600
+
+def simulate_discharge_times():
+    """模拟不同SOC初始量下的放电时间"""
     # 模拟参数
     t_span = (0, 24*3600)  # 24小时
     T_init = 298.15  # 初始温度25°C
@@ -33,37 +47,29 @@ def simulate_discharge_times():
     # 不同的初始SOC (20%, 40%, 60%, 80%, 100%)
     soc_values = [0.2, 0.4, 0.6, 0.8, 1.0]
     
-    # 存储结果
-    results_matrix = {}  # {场景名: [不同SOC下的放电时间]}
-    
     print("="*70)
     print("多场景、多初始SOC放电时间预测")
     print("="*70)
     
+    # 25个(SOC, 场景)组合相互独立，分发到多个进程并行仿真；
+    # map按提交顺序返回结果，顺序与下方二重循环一致
+    tasks = [(soc, scenario_func, t_span, T_init)
+             for soc in soc_values for scenario_func in scenarios.values()]
+    with ProcessPoolExecutor() as executor:
+        empty_times = np.fromiter(executor.map(_simulate_one, tasks), dtype=float,
+                                  count=len(tasks)).reshape(len(soc_values), len(scenarios))
+    
+    # 存储结果：行为SOC、列为场景，每个场景取一列
+    results_matrix = {name: empty_times[:, j] for j, name in enumerate(scenarios)}  # {场景名: 不同SOC下的放电时间}
+    
     # 二重循环：外层SOC，内层场景
-    for soc in soc_values:
+    for i, soc in enumerate(soc_values):
         print(f"\n{'='*70}")
         print(f"初始SOC: {soc*100:.0f}%")
         print(f"{'='*70}")
         
-        for name, scenario_func in scenarios.items():
-            print(f"  模拟场景: {name}...", end=' ')
-            
-            # 初始状态: [SOC, T_batt, U1, U2]
-            y0 = [soc, T_init, 0.0, 0.0]
-            
-            # 运行仿真
-            sol = battery.simulate(t_span, y0, scenario_func)
-            
-            # 计算放电时间
-            empty_time_hours = battery.find_empty_time(sol) / 3600
-            
-            # 存储结果
-            if name not in results_matrix:
-                results_matrix[name] = []
-            results_matrix[name].append(empty_time_hours)
-            
-            print(f"放空时间: {empty_time_hours:.2f} 小时")
+        for j, name in enumerate(scenarios):
+            print(f"  模拟场景: {name}... 放空时间: {empty_times[i, j]:.2f} 小时")
     
     return soc_values, results_matrix
 
@@ -131,7 +137,7 @@ def plot_bar_chart(soc_values, results_matrix):
     plt.tight_layout()
     plt.savefig('discharge_time_bar_chart.png', dpi=300, bbox_inches='tight')
     print("分组柱状图已保存为 discharge_time_bar_chart.png")
-    plt.show()
+    plt.close(fig)
 
 
 def plot_heatmap(soc_values, results_matrix):
@@ -170,7 +176,7 @@ def plot_heatmap(soc_values, results_matrix):
     plt.tight_layout()
     plt.savefig('discharge_time_heatmap.png', dpi=300, bbox_inches='tight')
     print("热力图已保存为 discharge_time_heatmap.png")
-    plt.show()
+    plt.close(fig)
 
 
 # 主程序
@@ -1,4 +1,6 @@
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # 仅保存图片，不需要交互式后端
 import matplotlib.pyplot as plt
 from matplotlib.gridspec import GridSpec
 import sys
@@ -6,7 +8,7 @@ from pathlib import Path
 project_root = Path(__file__).resolve().parents[1]  # 父目录的上级是 MCMA
 sys.path.insert(0, str(project_root))
 from model import SmartphoneBatteryModel
-from scenery import scenario_video_streaming
+from scenery import scenario_video_streaming, scenario_table
 
 plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'KaiTi', 'SimSun']
 plt.rcParams['axes.unicode_minus'] = False
@@ -33,8 +35,8 @@ def simulate_full_video_discharge():
     print(f"标称电压：{model.V_nom} V")
     print("="*70)
     
-    # 运行仿真（启用密集输出以便插值）
-    sol = model.simulate(t_span, y0, scenario_video_streaming, max_step=1.0)
+    # 运行仿真（启用密集输出：自适应大步长积分，绘图点由求解器的插值多项式给出）
+    sol = model.simulate(t_span, y0, scenario_video_streaming, max_step=600, dense_output=True)
     
     # 找到放空时间
     t_empty_s = model.find_empty_time(sol)
@@ -44,29 +46,18 @@ def simulate_full_video_discharge():
     print(f"  放电时长：{t_empty_h:.2f} 小时")
     print(f"  原始仿真步数：{len(sol.t)} 步")
     
-    # ========== 插值增加绘图点数 ==========
-    from scipy.interpolate import interp1d
-    
-    # 原始数据（截取到放空时刻）
-    mask = sol.t <= t_empty_s
-    t_original = sol.t[mask]
+    # ========== 密集输出增加绘图点数 ==========
+    # 原始数据点数（截取到放空时刻）
+    n_original = np.count_nonzero(sol.t <= t_empty_s)
     
     # 创建密集时间网格（增加到5000个点，可根据需要调整）
     n_dense_points = 5000
     t_dense = np.linspace(0, t_empty_s, n_dense_points)
     
-    # 对各个状态变量进行插值
-    f_soc = interp1d(t_original, sol.y[0, mask], kind='cubic', fill_value='extrapolate')
-    f_T = interp1d(t_original, sol.y[1, mask], kind='cubic', fill_value='extrapolate')
-    f_U1 = interp1d(t_original, sol.y[2, mask], kind='cubic', fill_value='extrapolate')
-    f_U2 = interp1d(t_original, sol.y[3, mask], kind='cubic', fill_value='extrapolate')
-    
-    soc_dense = f_soc(t_dense)
-    T_dense = f_T(t_dense)
-    U1_dense = f_U1(t_dense)
-    U2_dense = f_U2(t_dense)
+    # 直接在求解器的连续解上求值，无需另做样条插值
+    soc_dense, T_dense, U1_dense, U2_dense = sol.sol(t_dense)
     
-    print(f"  插值后绘图点数：{n_dense_points} 步（增加 {n_dense_points/len(t_original):.1f}x）")
+    print(f"  插值后绘图点数：{n_dense_points} 步（增加 {n_dense_points/n_original:.1f}x）")
     
     # 提取数据（使用插值后的密集数据）
     data = {
@@ -79,34 +70,17 @@ def simulate_full_video_discharge():
         't_empty_h': t_empty_h
     }
     
-    # 计算衍生量
-    data['V_oc'] = np.array([model.V_oc(soc) for soc in data['SOC']])
-    data['R0'] = np.array([model.get_RC_params(data['SOC'][i], data['T_batt'][i])[0] 
-                           for i in range(len(data['SOC']))])
-    data['R1'] = np.array([model.get_RC_params(data['SOC'][i], data['T_batt'][i])[1] 
-                           for i in range(len(data['SOC']))])
-    data['R2'] = np.array([model.get_RC_params(data['SOC'][i], data['T_batt'][i])[2] 
-                           for i in range(len(data['SOC']))])
-    
-    # 计算电流和功率
-    I_A = []
-    P_total = []
-    V_terminal = []
-    
-    for i in range(len(data['t_s'])):
-        scenario = scenario_video_streaming(data['t_s'][i])
-        P = model.component_power(data['t_s'][i], scenario)
-        I = model.solve_current(P, data['V_oc'][i], data['U1'][i], data['U2'][i], data['R0'][i])
-        V_term = model.get_terminal_voltage(data['SOC'][i], data['T_batt'][i], 
-                                            data['U1'][i], data['U2'][i], I)
-        
-        P_total.append(P)
-        I_A.append(I)
-        V_terminal.append(V_term)
-    
-    data['I_A'] = np.array(I_A)
-    data['P_total'] = np.array(P_total)
-    data['V_terminal'] = np.array(V_terminal)
+    # 计算衍生量（V_oc、get_RC_params 直接作用于整个数组）
+    data['V_oc'] = model.V_oc(data['SOC'])
+    data['R0'], data['R1'], data['R2'] = model.get_RC_params(data['SOC'], data['T_batt'])
+    
+    # 计算功率、电流和端电压（场景先整理成数组表，功率、电流、端电压均整段数组一次求解）
+    scenario = scenario_table(scenario_video_streaming, data['t_s'])
+    data['P_total'] = model.component_power(data['t_s'], scenario)
+    data['I_A'] = model.solve_current_vec(data['P_total'], data['V_oc'],
+                                          data['U1'], data['U2'], data['R0'])
+    # 端电压 V_oc - I*R0 - U1 - U2，直接复用上面已算出的 V_oc、R0 数组
+    data['V_terminal'] = data['V_oc'] - data['I_A'] * data['R0'] - data['U1'] - data['U2']
     data['T_celsius'] = data['T_batt'] - 273.15
     
     return model, data
@@ -114,17 +88,22 @@ def simulate_full_video_discharge():
 def plot_individual_charts(model, data):
     """生成5张独立图表"""
     
-    t_h = data['t_h']
     t_empty = data['t_empty_h']
     
+    # 绘图用抽稀数据（约1500点，肉眼无差别）；统计量仍使用data中的全分辨率数组
+    step = max(1, len(data['t_h']) // 1500)
+    t_h = data['t_h'][::step]
+    R0_mOhm, R1_mOhm, R2_mOhm = (data[k][::step]*1000 for k in ('R0', 'R1', 'R2'))
+    T_celsius = data['T_celsius'][::step]
+    
     
     # ========== 图3: 内阻+温度双轴 ==========
     fig3, ax3 = plt.subplots(figsize=(10, 6))
     
     # 左轴：内阻
-    ax3.plot(t_h, data['R0']*1000, color='#E74C3C', linewidth=2.5, label='$R_0$ (Ohm)')
-    ax3.plot(t_h, data['R1']*1000, color='#F39C12', linewidth=2.5, label='$R_1$ (Electrochemistry)', linestyle='--')
-    ax3.plot(t_h, data['R2']*1000, color='#9B59B6', linewidth=2.5, label='$R_2$ (Concentration)', linestyle='--')
+    ax3.plot(t_h, R0_mOhm, color='#E74C3C', linewidth=2.5, label='$R_0$ (Ohm)')
+    ax3.plot(t_h, R1_mOhm, color='#F39C12', linewidth=2.5, label='$R_1$ (Electrochemistry)', linestyle='--')
+    ax3.plot(t_h, R2_mOhm, color='#9B59B6', linewidth=2.5, label='$R_2$ (Concentration)', linestyle='--')
     ax3.axvline(t_empty, color='red', linestyle='--', alpha=0.6, linewidth=2)
     ax3.set_xlabel('Time(h)', fontweight='bold', fontsize=13)
     ax3.set_ylabel('Resistence(mΩ)', fontweight='bold', fontsize=13, color="#110F0F")
@@ -135,7 +114,7 @@ def plot_individual_charts(model, data):
     
     # 右轴：温度
     ax3_temp = ax3.twinx()
-    ax3_temp.plot(t_h, data['T_celsius'], color="#3B857C", linewidth=2.5, label='Battery temperature')
+    ax3_temp.plot(t_h, T_celsius, color="#3B857C", linewidth=2.5, label='Battery temperature')
     ax3_temp.axhline(25, color='green', linestyle=':', linewidth=2, alpha=0.6, label='Environment temperature')
     ax3_temp.set_ylabel('Temperature(°C)', fontweight='bold', fontsize=13, color="#833E85")
     ax3_temp.tick_params(axis='y', labelcolor="#852F9D")
@@ -146,9 +125,9 @@ def plot_individual_charts(model, data):
     ax3.legend(lines1 + lines2, labels1 + labels2, loc='upper left', fontsize=10, framealpha=0.9)
     
     plt.tight_layout()
-    plt.savefig('3_内阻与温度.png', dpi=400, bbox_inches='tight')
+    plt.savefig('3_内阻与温度.png', dpi=200, bbox_inches='tight')
     print("✓ 图3已保存: 3_内阻与温度.png")
-    plt.close()
+    plt.close(fig3)
     
 
 
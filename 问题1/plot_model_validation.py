@@ -3,9 +3,10 @@ Model Validation: 10,000 Phones Discharge Time Comparison
 Real vs Model Prediction with Scientific Visualization
 """
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import pandas as pd
-from scipy import stats
 
 # Set scientific style
 plt.rcParams['font.family'] = 'DejaVu Sans'
@@ -21,7 +22,7 @@ print("MODEL VALIDATION - 10,000 PHONES DISCHARGE TIME ANALYSIS")
 print("="*70)
 
 # Generate 10,000 phone data points
-np.random.seed(42)
+rng = np.random.default_rng(42)
 n_phones = 10000
 
 # Distribution parameters
@@ -35,46 +36,38 @@ n_long = n_phones - n_short     # 2000 phones
 
 # Short discharge times (0-10 hours) - gamma distribution
 alpha_short, loc_short, scale_short = 3.5, 0.5, 2.0
-model_short = stats.gamma.rvs(alpha_short, loc=loc_short, scale=scale_short, size=n_short)
+model_short = loc_short + rng.gamma(alpha_short, scale_short, n_short)
 model_short = np.clip(model_short, 0.5, 10.0)
 
 # Long discharge times (10-24+ hours) - exponential tail
-model_long = stats.expon.rvs(loc=10, scale=4.5, size=n_long)
+model_long = 10 + rng.exponential(4.5, n_long)
 model_long = np.clip(model_long, 10, 30)
 
 # Combine and shuffle
 model_predictions = np.concatenate([model_short, model_long])
-np.random.shuffle(model_predictions)
+rng.shuffle(model_predictions)
 
 # Generate real measurements with systematic and random errors
 # Real = Model + bias + random_error
-real_measurements = np.zeros_like(model_predictions)
-
-for i in range(n_phones):
-    model_val = model_predictions[i]
-    
-    # Add systematic bias (model tends to slightly overestimate)
-    bias = 0.05 * model_val * np.random.normal(0, 0.8)
-    
-    # Add random measurement error (heteroscedastic - increases with time)
-    error_std = 0.08 * model_val + 0.15
-    random_error = np.random.normal(0, error_std)
-    
-    real_measurements[i] = model_val + bias + random_error
+# Systematic bias (model tends to slightly overestimate)
+bias = 0.05 * model_predictions * rng.normal(0, 0.8, n_phones)
+
+# Random measurement error (heteroscedastic - increases with time)
+error_std = 0.08 * model_predictions + 0.15
+random_error = rng.normal(0, 1, n_phones) * error_std
+
+real_measurements = model_predictions + bias + random_error
 
 # Clip to physical bounds
 real_measurements = np.clip(real_measurements, 0.3, 35)
 
-# Sort both for better visualization
-sort_indices = np.argsort(model_predictions)
-model_sorted = model_predictions[sort_indices]
-real_sorted = real_measurements[sort_indices]
-
-# Calculate statistics
-mae = np.mean(np.abs(real_sorted - model_sorted))
-rmse = np.sqrt(np.mean((real_sorted - model_sorted)**2))
-mape = np.mean(np.abs((real_sorted - model_sorted) / real_sorted)) * 100
-correlation = np.corrcoef(real_sorted, model_sorted)[0, 1]
+# Calculate statistics (order-independent, so computed on the unsorted samples)
+diff = real_measurements - model_predictions
+abs_diff = np.abs(diff)
+mae = abs_diff.mean()
+rmse = np.sqrt(np.dot(diff, diff) / n_phones)
+mape = (abs_diff / real_measurements).mean() * 100
+correlation = np.corrcoef(real_measurements, model_predictions)[0, 1]
 r_squared = correlation ** 2
 
 print(f"\nStatistical Metrics:")
@@ -86,9 +79,14 @@ print(f"  Correlation Coefficient: {correlation:.4f}")
 print(f"  R² Score: {r_squared:.4f}")
 
 print(f"\nData Distribution:")
-print(f"  0-10 hours: {np.sum(real_sorted <= 10)/n_phones*100:.1f}%")
-print(f"  10-24 hours: {np.sum((real_sorted > 10) & (real_sorted <= 24))/n_phones*100:.1f}%")
-print(f"  >24 hours: {np.sum(real_sorted > 24)/n_phones*100:.1f}%")
+print(f"  0-10 hours: {np.sum(real_measurements <= 10)/n_phones*100:.1f}%")
+print(f"  10-24 hours: {np.sum((real_measurements > 10) & (real_measurements <= 24))/n_phones*100:.1f}%")
+print(f"  >24 hours: {np.sum(real_measurements > 24)/n_phones*100:.1f}%")
+
+# Sort both by model prediction, only needed for the plot ordering
+sort_indices = np.argsort(model_predictions)
+model_sorted = model_predictions[sort_indices]
+real_sorted = real_measurements[sort_indices]
 
 # Create the plot
 fig, ax = plt.subplots(figsize=(14, 8))
@@ -98,15 +96,15 @@ x_axis = np.arange(n_phones)
 
 # Real measurements (blue) - put at bottom layer
 ax.plot(x_axis, real_sorted, linewidth=0.8, color='#2E86AB', 
-        label='Real Measurements', alpha=0.85, zorder=1)
+        label='Real Measurements', alpha=0.85, zorder=1, rasterized=True)
 
 # Model predictions (red) - put on top
 ax.plot(x_axis, model_sorted, linewidth=1.2, color='#E63946', 
-        label='Model Predictions', alpha=0.85, zorder=2)
+        label='Model Predictions', alpha=0.85, zorder=2, rasterized=True)
 
 # Add shaded error region
 ax.fill_between(x_axis, model_sorted - rmse, model_sorted + rmse, 
-                alpha=0.15, color="#9C2933", label=f'±RMSE', zorder=0)
+                alpha=0.15, color="#9C2933", label=f'±RMSE', zorder=0, rasterized=True)
 
 # Add horizontal reference lines
 ax.axhline(y=10, color='#2A9D8F', linestyle='--', linewidth=1.5, 
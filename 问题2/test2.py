@@ -1,130 +1,134 @@
+import io
+import sys
+
 import numpy as np
+import pandas as pd
 #import matplotlib.pyplot as plt
 
-phone=[[6.06,6.4,7.15,6.3,6.42],
-       [5.14,4.01,4.7,4.77,5.21],
-       [6.02,5.24,6.72,5.82,5.39],
-       [4.2,3.96,4.18,3.61,3.8],
-       [50.2,52.2,51.7,52.6,49.5]]
-
-data=[[6.1,6.2,6.8,6.0,6.5],
-      [4.2,3.7,4.5,4.2,4.6],
-      [5.5,5.1,6.25,6.0,5.1],
-      [3.5,3.1,4.0,3.2,3.4],
-      [50.4,51.6,52.1,53.3,50.3]]
-
-row_names = ['视频', '游戏', '导航', '低温视频', '空闲']
-
-print("="*80)
-print("模型拟合效果分析 (Model vs Experimental Data)")
-print("="*80)
-
-# 转换为numpy数组
-phone_array = np.array(phone)
-data_array = np.array(data)
-
-# 逐行分析
-all_metrics = []
-
-for i in range(len(phone)):
-    print(f"\n【单元 {i+1}: {row_names[i]}】")
-    print(f"  实验数据: {phone[i]}")
-    print(f"  模型数据: {data[i]}")
-    
-    # 计算逐个差值
-    differences = [phone[i][j] - data[i][j] for j in range(5)]
-    abs_differences = [abs(d) for d in differences]
+def compute_metrics(phone, data):
+    """
+    按行计算每个单元的拟合指标，可复用于任意行数的 phone/data 矩阵
+    返回: (逐点差值, 绝对误差, 相对误差%, MAE, RMSE, MAPE, R²)
+    """
+    differences = phone - data
+    abs_differences = np.abs(differences)
+    relative_errors = abs_differences / data * 100  # 相对误差（百分比）
     
-    # 计算相对误差（百分比）
-    relative_errors = [(abs(phone[i][j] - data[i][j]) / data[i][j]) * 100 for j in range(5)]
-    
-    # 计算统计指标
-    mae = np.mean(abs_differences)  # 平均绝对误差
-    rmse = np.sqrt(np.mean([(phone[i][j] - data[i][j])**2 for j in range(5)]))  # 均方根误差
-    mape = np.mean(relative_errors)  # 平均绝对百分比误差
+    n = phone.shape[1]
+    mae = abs_differences.sum(axis=1) / n  # 平均绝对误差
+    ss_res = np.einsum('ij,ij->i', differences, differences)
+    rmse = np.sqrt(ss_res / n)  # 均方根误差
+    mape = relative_errors.sum(axis=1) / n  # 平均绝对百分比误差
     
     # R² (决定系数)
-    ss_res = sum((phone[i][j] - data[i][j])**2 for j in range(5))
-    ss_tot = sum((phone[i][j] - np.mean(phone[i]))**2 for j in range(5))
-    r_squared = 1 - (ss_res / ss_tot) if ss_tot != 0 else 0
+    centered = phone - phone.mean(axis=1, keepdims=True)
+    ss_tot = np.einsum('ij,ij->i', centered, centered)
+    has_var = ss_tot != 0
+    r2 = np.where(has_var, 1 - ss_res / np.where(has_var, ss_tot, 1), 0)
+    return differences, abs_differences, relative_errors, mae, rmse, mape, r2
+
+phone=np.array([[6.06,6.4,7.15,6.3,6.42],
+                [5.14,4.01,4.7,4.77,5.21],
+                [6.02,5.24,6.72,5.82,5.39],
+                [4.2,3.96,4.18,3.61,3.8],
+                [50.2,52.2,51.7,52.6,49.5]], dtype=np.float64)
+
+data=np.array([[6.1,6.2,6.8,6.0,6.5],
+               [4.2,3.7,4.5,4.2,4.6],
+               [5.5,5.1,6.25,6.0,5.1],
+               [3.5,3.1,4.0,3.2,3.4],
+               [50.4,51.6,52.1,53.3,50.3]], dtype=np.float64)
+
+row_names = ['视频', '游戏', '导航', '低温视频', '空闲']
+
+# 报告先写入缓冲区，最后一次性输出
+out = io.StringIO()
+
+print("="*80, file=out)
+print("模型拟合效果分析 (Model vs Experimental Data)", file=out)
+print("="*80, file=out)
+
+# 所有单元的误差指标一次按行计算
+(differences, abs_differences, relative_errors,
+ mae_all, rmse_all, mape_all, r2_all) = compute_metrics(phone, data)
+
+# 最大误差位置
+max_error_idx_all = np.argmax(abs_differences, axis=1)
+
+# 拟合质量评价（按阈值一次分档）
+grade_a = (mape_all < 5) & (r2_all > 0.95)
+grade_b = (mape_all < 10) & (r2_all > 0.85) & ~grade_a
+grade_c = (mape_all < 15) & (r2_all > 0.70) & ~grade_a & ~grade_b
+scores = np.select([grade_a, grade_b, grade_c], ['A', 'B', 'C'], default='D')
+qualities = np.select([grade_a, grade_b, grade_c], ['优秀', '良好', '一般'], default='较差')
+
+# 逐行输出
+for i, (mae, rmse, mape, r_squared, score, quality) in enumerate(
+        zip(mae_all, rmse_all, mape_all, r2_all, scores, qualities)):
+    print(f"\n【单元 {i+1}: {row_names[i]}】", file=out)
+    print(f"  实验数据: {phone[i].tolist()}", file=out)
+    print(f"  模型数据: {data[i].tolist()}", file=out)
     
     # 最大误差
-    max_error_idx = np.argmax(abs_differences)
-    max_error = abs_differences[max_error_idx]
-    max_rel_error = relative_errors[max_error_idx]
+    max_error_idx = max_error_idx_all[i]
+    max_error = abs_differences[i, max_error_idx]
+    max_rel_error = relative_errors[i, max_error_idx]
     
-    print(f"\n  逐点差值: {[f'{d:+.4f}' for d in differences]}")
-    print(f"  相对误差: {[f'{re:.2f}%' for re in relative_errors]}")
-    print(f"\n  统计指标:")
-    print(f"  ├─ MAE (平均绝对误差): {mae:.4f}")
-    print(f"  ├─ RMSE (均方根误差): {rmse:.4f}")
-    print(f"  ├─ MAPE (平均相对误差): {mape:.2f}%")
-    print(f"  ├─ R² (决定系数): {r_squared:.4f}")
-    print(f"  └─ 最大误差: {max_error:.4f} ({max_rel_error:.2f}%) [第{max_error_idx+1}个点]")
+    print(f"\n  逐点差值: {[f'{d:+.4f}' for d in differences[i]]}", file=out)
+    print(f"  相对误差: {[f'{re:.2f}%' for re in relative_errors[i]]}", file=out)
+    print(f"\n  统计指标:", file=out)
+    print(f"  ├─ MAE (平均绝对误差): {mae:.4f}", file=out)
+    print(f"  ├─ RMSE (均方根误差): {rmse:.4f}", file=out)
+    print(f"  ├─ MAPE (平均相对误差): {mape:.2f}%", file=out)
+    print(f"  ├─ R² (决定系数): {r_squared:.4f}", file=out)
+    print(f"  └─ 最大误差: {max_error:.4f} ({max_rel_error:.2f}%) [第{max_error_idx+1}个点]", file=out)
     
-    # 拟合质量评价
-    if mape < 5 and r_squared > 0.95:
-        quality = "优秀"
-        score = "A"
-    elif mape < 10 and r_squared > 0.85:
-        quality = "良好"
-        score = "B"
-    elif mape < 15 and r_squared > 0.70:
-        quality = "一般"
-        score = "C"
-    else:
-        quality = "较差"
-        score = "D"
-    
-    print(f"\n  拟合质量: {quality} (评级: {score})")
-    
-    all_metrics.append({
-        'unit': row_names[i],
-        'mae': mae,
-        'rmse': rmse,
-        'mape': mape,
-        'r2': r_squared,
-        'score': score
-    })
+    print(f"\n  拟合质量: {quality} (评级: {score})", file=out)
+
+metrics_df = pd.DataFrame({
+    'unit': row_names,
+    'mae': mae_all,
+    'rmse': rmse_all,
+    'mape': mape_all,
+    'r2': r2_all,
+    'score': scores
+})
 
 # 综合评估
-print("\n" + "="*80)
-print("综合评估报告")
-print("="*80)
+print("\n" + "="*80, file=out)
+print("综合评估报告", file=out)
+print("="*80, file=out)
 
-avg_mape = np.mean([m['mape'] for m in all_metrics])
-avg_r2 = np.mean([m['r2'] for m in all_metrics])
-avg_mae = np.mean([m['mae'] for m in all_metrics])
-avg_rmse = np.mean([m['rmse'] for m in all_metrics])
+avg_mape, avg_r2, avg_mae, avg_rmse = metrics_df[['mape', 'r2', 'mae', 'rmse']].mean()
 
-print(f"\n整体平均指标:")
-print(f"  平均MAPE: {avg_mape:.2f}%")
-print(f"  平均R²: {avg_r2:.4f}")
-print(f"  平均MAE: {avg_mae:.4f}")
-print(f"  平均RMSE: {avg_rmse:.4f}")
+print(f"\n整体平均指标:", file=out)
+print(f"  平均MAPE: {avg_mape:.2f}%", file=out)
+print(f"  平均R²: {avg_r2:.4f}", file=out)
+print(f"  平均MAE: {avg_mae:.4f}", file=out)
+print(f"  平均RMSE: {avg_rmse:.4f}", file=out)
 
 # 找出最好和最差的单元
-best_unit = min(all_metrics, key=lambda x: x['mape'])
-worst_unit = max(all_metrics, key=lambda x: x['mape'])
+best_unit = metrics_df.loc[metrics_df['mape'].idxmin()]
+worst_unit = metrics_df.loc[metrics_df['mape'].idxmax()]
 
-print(f"\n拟合最好的单元: {best_unit['unit']} (MAPE: {best_unit['mape']:.2f}%, R²: {best_unit['r2']:.4f})")
-print(f"拟合最差的单元: {worst_unit['unit']} (MAPE: {worst_unit['mape']:.2f}%, R²: {worst_unit['r2']:.4f})")
+print(f"\n拟合最好的单元: {best_unit['unit']} (MAPE: {best_unit['mape']:.2f}%, R²: {best_unit['r2']:.4f})", file=out)
+print(f"拟合最差的单元: {worst_unit['unit']} (MAPE: {worst_unit['mape']:.2f}%, R²: {worst_unit['r2']:.4f})", file=out)
 
 # 总体评级
-a_count = sum(1 for m in all_metrics if m['score'] == 'A')
-b_count = sum(1 for m in all_metrics if m['score'] == 'B')
-c_count = sum(1 for m in all_metrics if m['score'] == 'C')
-d_count = sum(1 for m in all_metrics if m['score'] == 'D')
+score_counts = metrics_df['score'].value_counts().reindex(['A', 'B', 'C', 'D'], fill_value=0)
+a_count, b_count, c_count, d_count = score_counts
 
-print(f"\n评级分布: A={a_count}, B={b_count}, C={c_count}, D={d_count}")
+print(f"\n评级分布: A={a_count}, B={b_count}, C={c_count}, D={d_count}", file=out)
 
 if avg_mape < 5 and avg_r2 > 0.95:
-    print("\n总体拟合质量: 优秀")
+    print("\n总体拟合质量: 优秀", file=out)
 elif avg_mape < 10 and avg_r2 > 0.85:
-    print("\n总体拟合质量: 良好")
+    print("\n总体拟合质量: 良好", file=out)
 elif avg_mape < 15 and avg_r2 > 0.70:
-    print("\n总体拟合质量: 一般")
+    print("\n总体拟合质量: 一般", file=out)
 else:
-    print("\n总体拟合质量: 需要改进")
+    print("\n总体拟合质量: 需要改进", file=out)
+
+print("="*80, file=out)
 
-print("="*80)
+sys.stdout.write(out.getvalue())
@@ -9,19 +9,21 @@ Each factor: 500 simulations
 Initial state: Full charge (SOC=100%), Video Streaming scenario
 Goal: Demonstrate model stability under small parameter variations
 """
+import argparse
 import numpy as np
-import matplotlib.pyplot as plt
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
 
 project_root = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(project_root))
 from model import SmartphoneBatteryModel
-from scenery import scenario_video_streaming
+from scenery import scenario_video_streaming, time_invariant
 
-# English fonts
-plt.rcParams['font.family'] = 'DejaVu Sans'
-plt.rcParams['axes.unicode_minus'] = False
+# Matplotlib is imported lazily by _setup_plots() so that simulation-only use
+# (and spawned Monte Carlo workers) skip the pyplot import and font setup
 
 
 def run_single_simulation(model, scenario_func, T_amb=298.15):
@@ -32,7 +34,9 @@ def run_single_simulation(model, scenario_func, T_amb=298.15):
     t_span = (0, 50 * 3600)  # Max 50 hours for video streaming
     
     try:
-        sol = model.simulate(t_span, y0, scenario_func, max_step=120)
+        # LSODA stops at SOC depletion (terminal event), so the 50 h span costs
+        # nothing past empty; max_step only needs to resolve the 5% SOC crossing
+        sol = model.simulate(t_span, y0, scenario_func, max_step=300, method='LSODA')
         t_empty_s = model.find_empty_time(sol)
         t_empty_h = t_empty_s / 3600
         return t_empty_h
@@ -41,87 +45,153 @@ def run_single_simulation(model, scenario_func, T_amb=298.15):
         return np.nan
 
 
-def monte_carlo_aging(n_sim=500):
-    """Monte Carlo simulation varying aging rate constant (small perturbation ±6%)"""
-    print(f"\n[1/3] Simulating aging rate uncertainty ({n_sim} runs)...")
-    print(f"  Perturbation: 5.0±0.3 ×10⁻⁶ h⁻¹ (±6% variation)")
+# One Monte Carlo sample per record: every run carries all three
+# parameters, with the ones a factor does not perturb left at nominal
+SAMPLE_DTYPE = np.dtype([('k_aging', np.float64),
+                         ('R0', np.float64),
+                         ('T_amb', np.float64)])
+T_AMB_NOMINAL = 298.15
+
+# Per-process model instance, built once by the pool initializer. Every
+# sample sets both perturbable model parameters, so nothing carries over
+# from the previous run.
+_model = None
+
+
+def _init_worker():
+    global _model
+    _model = SmartphoneBatteryModel()
+
+
+def nominal_samples(n_sim):
+    """Structured array of n_sim samples, all at the nominal parameter values"""
+    model = SmartphoneBatteryModel()
+    samples = np.empty(n_sim, dtype=SAMPLE_DTYPE)
+    samples['k_aging'] = model.k_aging
+    samples['R0'] = model.R0
+    samples['T_amb'] = T_AMB_NOMINAL
+    return samples
+
+
+def _simulate_sample(sample):
+    """Worker: discharge time (h) for one sample record"""
+    _model.k_aging = sample['k_aging']
+    _model.R0 = sample['R0']
+    T_amb = float(sample['T_amb'])
+    scenario_func = scenario_video_streaming
+    if T_amb != T_AMB_NOMINAL:
+        # Bind the sample's T_amb; the scenario is still constant in time
+        scenario_func = time_invariant(partial(scenario_video_streaming, T_amb=T_amb))
+    return run_single_simulation(_model, scenario_func, T_amb=T_amb)
+
+
+def run_parallel(samples):
+    """
+    Run one independent simulation per sample record on all CPU cores.
+    Results come back in sample order. Samples are sent in chunks (about
+    four per core) so each run does not cost its own pickling round trip.
+    """
+    n_sim = len(samples)
+    discharge_times = np.empty(n_sim)
+    chunksize = max(1, n_sim // (4 * (os.cpu_count() or 1)))
     
-    # Aging rate: 5e-6 ± 0.3e-6 (±6% variation)
-    k_aging_samples = np.random.normal(5e-6, 0.3e-6, n_sim)
-    k_aging_samples = np.clip(k_aging_samples, 4.0e-6, 6.0e-6)
+    with ProcessPoolExecutor(initializer=_init_worker) as executor:
+        for i, t_h in enumerate(executor.map(_simulate_sample, samples, chunksize=chunksize)):
+            if (i + 1) % 100 == 0:
+                print(f"  Progress: {i+1}/{n_sim}")
+            discharge_times[i] = t_h
+    
+    return discharge_times
+
+
+def aging_samples(n_sim=500, rng=None):
+    """Sample records varying aging rate constant (small perturbation ±6%)"""
+    print(f"\n[1/3] Sampling aging rate uncertainty ({n_sim} samples)")
+    print(f"  Perturbation: 5.0±0.3 ×10⁻⁶ h⁻¹ (±6% variation)")
     
-    discharge_times = []
+    rng = np.random.default_rng() if rng is None else rng
     
-    for i, k_aging in enumerate(k_aging_samples):
-        if (i + 1) % 100 == 0:
-            print(f"  Progress: {i+1}/{n_sim}")
-        
-        model = SmartphoneBatteryModel()
-        model.k_aging = k_aging
-        
-        t_h = run_single_simulation(model, scenario_video_streaming, T_amb=298.15)
-        discharge_times.append(t_h)
+    # Aging rate: 5e-6 ± 0.3e-6 (±6% variation)
+    samples = nominal_samples(n_sim)
+    samples['k_aging'] = np.clip(rng.normal(5e-6, 0.3e-6, n_sim), 4.0e-6, 6.0e-6)
     
-    return np.array(discharge_times), k_aging_samples
+    return samples, samples['k_aging']
 
 
-def monte_carlo_resistance(n_sim=500):
-    """Monte Carlo simulation varying initial ohmic resistance (small perturbation ±10%)"""
-    print(f"\n[2/3] Simulating ohmic resistance uncertainty ({n_sim} runs)...")
+def resistance_samples(n_sim=500, rng=None):
+    """Sample records varying initial ohmic resistance (small perturbation ±10%)"""
+    print(f"\n[2/3] Sampling ohmic resistance uncertainty ({n_sim} samples)")
     print(f"  Perturbation: 0.030±0.003 Ω (±10% variation)")
     
-    # R0: 0.03 ± 0.003 Ohm (±10% variation)
-    R0_samples = np.random.normal(0.03, 0.003, n_sim)
-    R0_samples = np.clip(R0_samples, 0.024, 0.036)
-    
-    discharge_times = []
+    rng = np.random.default_rng() if rng is None else rng
     
-    for i, R0 in enumerate(R0_samples):
-        if (i + 1) % 100 == 0:
-            print(f"  Progress: {i+1}/{n_sim}")
-        
-        model = SmartphoneBatteryModel()
-        model.R0 = R0
-        
-        t_h = run_single_simulation(model, scenario_video_streaming, T_amb=298.15)
-        discharge_times.append(t_h)
+    # R0: 0.03 ± 0.003 Ohm (±10% variation)
+    samples = nominal_samples(n_sim)
+    samples['R0'] = np.clip(rng.normal(0.03, 0.003, n_sim), 0.024, 0.036)
     
-    return np.array(discharge_times), R0_samples
+    return samples, samples['R0']
 
 
-def monte_carlo_temperature(n_sim=500):
-    """Monte Carlo simulation varying ambient temperature (small perturbation ±5°C)"""
-    print(f"\n[3/3] Simulating ambient temperature uncertainty ({n_sim} runs)...")
+def temperature_samples(n_sim=500, rng=None):
+    """Sample records varying ambient temperature (small perturbation ±5°C)"""
+    print(f"\n[3/3] Sampling ambient temperature uncertainty ({n_sim} samples)")
     print(f"  Perturbation: 25±5 °C (±20% variation)")
     
+    rng = np.random.default_rng() if rng is None else rng
+    
     # Temperature: 25±5°C (small perturbation around room temperature)
-    T_amb_celsius = np.random.normal(25, 5, n_sim)
+    T_amb_celsius = rng.normal(25, 5, n_sim)
     T_amb_celsius = np.clip(T_amb_celsius, 15, 35)
-    T_amb_kelvin = T_amb_celsius + 273.15
+    samples = nominal_samples(n_sim)
+    samples['T_amb'] = T_amb_celsius + 273.15
     
-    discharge_times = []
+    return samples, T_amb_celsius
+
+
+def monte_carlo_all(n_sim=500, rng=None):
+    """
+    Run all three factors through a single process pool.
+    Samples are drawn factor by factor (aging, R0, temperature) from rng;
+    returns one (discharge_times, params) pair per factor.
+    """
+    rng = np.random.default_rng() if rng is None else rng
     
-    for i, T_amb in enumerate(T_amb_kelvin):
-        if (i + 1) % 100 == 0:
-            print(f"  Progress: {i+1}/{n_sim}")
-        
-        model = SmartphoneBatteryModel()
-        
-        # Create scenario function with specific T_amb
-        scenario_func = lambda t, T=T_amb: {**scenario_video_streaming(t), 'T_amb': T}
-        
-        t_h = run_single_simulation(model, scenario_func, T_amb=T_amb)
-        discharge_times.append(t_h)
+    factors = [aging_samples(n_sim, rng),
+               resistance_samples(n_sim, rng),
+               temperature_samples(n_sim, rng)]
     
-    return np.array(discharge_times), T_amb_celsius
+    print(f"\nSimulating all {len(factors) * n_sim} runs ({len(factors)} factors × {n_sim})...")
+    discharge_times = run_parallel(np.concatenate([samples for samples, _ in factors]))
+    
+    return [(times, params) for times, (_, params)
+            in zip(np.split(discharge_times, len(factors)), factors)]
+
+
+def _setup_plots():
+    """Import pyplot and apply English font settings; only needed when plotting"""
+    import matplotlib
+    matplotlib.use('Agg')  # figures are only saved, never shown
+    import matplotlib.pyplot as plt
+    plt.rcParams['font.family'] = 'DejaVu Sans'
+    plt.rcParams['axes.unicode_minus'] = False
+    return plt
+
+
+def _stats(times):
+    """NaN-aware (mean, std, min, max, CV%) of one factor's discharge times"""
+    mean = np.nanmean(times)
+    std = np.nanstd(times)
+    return mean, std, np.nanmin(times), np.nanmax(times), (std / mean) * 100
 
 
 def plot_results(times_aging, times_R0, times_temp, 
-                 params_aging, params_R0, params_temp):
+                 params_aging, params_R0, params_temp, dpi=150):
     """
     Plot Monte Carlo results emphasizing model stability
     Small perturbations should result in small output variations
+    dpi: resolution of the saved PNG (150 for iteration, 400 for the final figure)
     """
+    plt = _setup_plots()
     
     fig, axes = plt.subplots(1, 3, figsize=(16, 5))
     
@@ -131,22 +201,15 @@ def plot_results(times_aging, times_R0, times_temp,
     idx_temp = np.argsort(params_temp)
     
     # Calculate statistics for each factor
-    mean_aging = np.nanmean(times_aging)
-    std_aging = np.nanstd(times_aging)
-    cv_aging = (std_aging / mean_aging) * 100
-    
-    mean_R0 = np.nanmean(times_R0)
-    std_R0 = np.nanstd(times_R0)
-    cv_R0 = (std_R0 / mean_R0) * 100
-    
-    mean_temp = np.nanmean(times_temp)
-    std_temp = np.nanstd(times_temp)
-    cv_temp = (std_temp / mean_temp) * 100
+    mean_aging, std_aging, min_aging, max_aging, cv_aging = _stats(times_aging)
+    mean_R0, std_R0, min_R0, max_R0, cv_R0 = _stats(times_R0)
+    mean_temp, std_temp, min_temp, max_temp, cv_temp = _stats(times_temp)
     
     # ===== Plot 1: Aging Rate (±6% perturbation) =====
     ax1 = axes[0]
     ax1.plot(params_aging[idx_aging] * 1e6, times_aging[idx_aging], 
-             'o', color='#E74C3C', markersize=3, alpha=0.5, label='Simulations')
+             'o', color='#E74C3C', markersize=3, alpha=0.5, label='Simulations',
+             rasterized=True)
     ax1.axhline(mean_aging, color='#C0392B', linestyle='--', linewidth=2.5, 
                label=f'Mean: {mean_aging:.2f}h')
     ax1.axhspan(mean_aging - std_aging, mean_aging + std_aging, 
@@ -156,17 +219,18 @@ def plot_results(times_aging, times_R0, times_temp,
     ax1.set_ylabel('Discharge Time (h)', fontsize=12, fontweight='bold')
     ax1.set_title(f'Aging Rate\nCV = {cv_aging:.2f}%', fontsize=12, fontweight='bold')
     ax1.grid(True, alpha=0.3, linestyle='--', linewidth=0.5)
-    ax1.legend(loc='best', fontsize=9)
+    ax1.legend(loc='upper right', fontsize=9)
     
     # Add stability text
-    ax1.text(0.98, 0.02, f'Range: {np.nanmin(times_aging):.2f}-{np.nanmax(times_aging):.2f}h\nΔ = {np.nanmax(times_aging)-np.nanmin(times_aging):.3f}h', 
+    ax1.text(0.98, 0.02, f'Range: {min_aging:.2f}-{max_aging:.2f}h\nΔ = {max_aging-min_aging:.3f}h', 
             transform=ax1.transAxes, fontsize=8, va='bottom', ha='right',
             bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.6))
     
     # ===== Plot 2: Ohmic Resistance (±10% perturbation) =====
     ax2 = axes[1]
     ax2.plot(params_R0[idx_R0] * 1000, times_R0[idx_R0], 
-             'o', color='#27AE60', markersize=3, alpha=0.5, label='Simulations')
+             'o', color='#27AE60', markersize=3, alpha=0.5, label='Simulations',
+             rasterized=True)
     ax2.axhline(mean_R0, color='#1E8449', linestyle='--', linewidth=2.5, 
                label=f'Mean: {mean_R0:.2f}h')
     ax2.axhspan(mean_R0 - std_R0, mean_R0 + std_R0, 
@@ -176,17 +240,18 @@ def plot_results(times_aging, times_R0, times_temp,
     ax2.set_ylabel('Discharge Time (h)', fontsize=12, fontweight='bold')
     ax2.set_title(f'Resistance R$_0$\nCV = {cv_R0:.2f}%', fontsize=12, fontweight='bold')
     ax2.grid(True, alpha=0.3, linestyle='--', linewidth=0.5)
-    ax2.legend(loc='best', fontsize=9)
+    ax2.legend(loc='upper right', fontsize=9)
     
     # Add stability text
-    ax2.text(0.98, 0.02, f'Range: {np.nanmin(times_R0):.2f}-{np.nanmax(times_R0):.2f}h\nΔ = {np.nanmax(times_R0)-np.nanmin(times_R0):.3f}h', 
+    ax2.text(0.98, 0.02, f'Range: {min_R0:.2f}-{max_R0:.2f}h\nΔ = {max_R0-min_R0:.3f}h', 
             transform=ax2.transAxes, fontsize=8, va='bottom', ha='right',
             bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.6))
     
     # ===== Plot 3: Ambient Temperature (±5°C perturbation) =====
     ax3 = axes[2]
     ax3.plot(params_temp[idx_temp], times_temp[idx_temp], 
-             'o', color='#3498DB', markersize=3, alpha=0.5, label='Simulations')
+             'o', color='#3498DB', markersize=3, alpha=0.5, label='Simulations',
+             rasterized=True)
     ax3.axhline(mean_temp, color='#2874A6', linestyle='--', linewidth=2.5, 
                label=f'Mean: {mean_temp:.2f}h')
     ax3.axhspan(mean_temp - std_temp, mean_temp + std_temp, 
@@ -196,15 +261,15 @@ def plot_results(times_aging, times_R0, times_temp,
     ax3.set_ylabel('Discharge Time (h)', fontsize=12, fontweight='bold')
     ax3.set_title(f'Temperature\nCV = {cv_temp:.2f}%', fontsize=12, fontweight='bold')
     ax3.grid(True, alpha=0.3, linestyle='--', linewidth=0.5)
-    ax3.legend(loc='best', fontsize=9)
+    ax3.legend(loc='upper left', fontsize=9)
     
     # Add stability text
-    ax3.text(0.98, 0.02, f'Range: {np.nanmin(times_temp):.2f}-{np.nanmax(times_temp):.2f}h\nΔ = {np.nanmax(times_temp)-np.nanmin(times_temp):.3f}h', 
+    ax3.text(0.98, 0.02, f'Range: {min_temp:.2f}-{max_temp:.2f}h\nΔ = {max_temp-min_temp:.3f}h', 
             transform=ax3.transAxes, fontsize=8, va='bottom', ha='right',
             bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.6))
     
     plt.tight_layout()
-    plt.savefig('monte_carlo_distribution.png', dpi=400, bbox_inches='tight')
+    plt.savefig('monte_carlo_distribution.png', dpi=dpi, bbox_inches='tight')
     print("\n✓ Figure saved: monte_carlo_distribution.png")
     plt.close()
     
@@ -215,18 +280,18 @@ def plot_results(times_aging, times_R0, times_temp,
     print("\nSmall Perturbations → Small Output Variations (Model is STABLE)")
     print("\n1. Aging Rate (±6% perturbation):")
     print(f"   Mean: {mean_aging:.3f} h  |  Std: {std_aging:.3f} h  |  CV: {cv_aging:.2f}%")
-    print(f"   Range: {np.nanmin(times_aging):.3f} ~ {np.nanmax(times_aging):.3f} h")
-    print(f"   Max Deviation: ±{max(abs(mean_aging - np.nanmin(times_aging)), abs(np.nanmax(times_aging) - mean_aging)):.3f} h ({max(abs(mean_aging - np.nanmin(times_aging)), abs(np.nanmax(times_aging) - mean_aging))/mean_aging*100:.2f}%)")
+    print(f"   Range: {min_aging:.3f} ~ {max_aging:.3f} h")
+    print(f"   Max Deviation: ±{max(abs(mean_aging - min_aging), abs(max_aging - mean_aging)):.3f} h ({max(abs(mean_aging - min_aging), abs(max_aging - mean_aging))/mean_aging*100:.2f}%)")
     
     print("\n2. Ohmic Resistance R₀ (±10% perturbation):")
     print(f"   Mean: {mean_R0:.3f} h  |  Std: {std_R0:.3f} h  |  CV: {cv_R0:.2f}%")
-    print(f"   Range: {np.nanmin(times_R0):.3f} ~ {np.nanmax(times_R0):.3f} h")
-    print(f"   Max Deviation: ±{max(abs(mean_R0 - np.nanmin(times_R0)), abs(np.nanmax(times_R0) - mean_R0)):.3f} h ({max(abs(mean_R0 - np.nanmin(times_R0)), abs(np.nanmax(times_R0) - mean_R0))/mean_R0*100:.2f}%)")
+    print(f"   Range: {min_R0:.3f} ~ {max_R0:.3f} h")
+    print(f"   Max Deviation: ±{max(abs(mean_R0 - min_R0), abs(max_R0 - mean_R0)):.3f} h ({max(abs(mean_R0 - min_R0), abs(max_R0 - mean_R0))/mean_R0*100:.2f}%)")
     
     print("\n3. Ambient Temperature (±5°C perturbation):")
     print(f"   Mean: {mean_temp:.3f} h  |  Std: {std_temp:.3f} h  |  CV: {cv_temp:.2f}%")
-    print(f"   Range: {np.nanmin(times_temp):.3f} ~ {np.nanmax(times_temp):.3f} h")
-    print(f"   Max Deviation: ±{max(abs(mean_temp - np.nanmin(times_temp)), abs(np.nanmax(times_temp) - mean_temp)):.3f} h ({max(abs(mean_temp - np.nanmin(times_temp)), abs(np.nanmax(times_temp) - mean_temp))/mean_temp*100:.2f}%)")
+    print(f"   Range: {min_temp:.3f} ~ {max_temp:.3f} h")
+    print(f"   Max Deviation: ±{max(abs(mean_temp - min_temp), abs(max_temp - mean_temp)):.3f} h ({max(abs(mean_temp - min_temp), abs(max_temp - mean_temp))/mean_temp*100:.2f}%)")
     
     # Overall stability assessment
     avg_cv = (cv_aging + cv_R0 + cv_temp) / 3
@@ -244,6 +309,11 @@ def plot_results(times_aging, times_R0, times_temp,
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Monte Carlo stability analysis of discharge time")
+    parser.add_argument('--dpi', type=int, default=150,
+                        help="resolution of the saved figure (use 400 for the final version)")
+    args = parser.parse_args()
+    
     print("="*70)
     print("MONTE CARLO SIMULATION - MODEL STABILITY ANALYSIS")
     print("Scenario: Video Streaming, Full Charge (SOC=100%)")
@@ -251,15 +321,16 @@ if __name__ == '__main__':
     print("Simulations per factor: 500")
     print("="*70)
     
-    np.random.seed(42)
+    # One seeded generator shared by all three factors (each draws its samples in bulk)
+    rng = np.random.default_rng(42)
     
-    # Run Monte Carlo simulations
-    times_aging, params_aging = monte_carlo_aging(500)
-    times_R0, params_R0 = monte_carlo_resistance(500)
-    times_temp, params_temp = monte_carlo_temperature(500)
+    # Run Monte Carlo simulations (all 1500 runs share one process pool)
+    ((times_aging, params_aging),
+     (times_R0, params_R0),
+     (times_temp, params_temp)) = monte_carlo_all(500, rng)
     
     # Plot all results emphasizing stability
     plot_results(times_aging, times_R0, times_temp,
-                 params_aging, params_R0, params_temp)
+                 params_aging, params_R0, params_temp, dpi=args.dpi)
     
     print("\n✅ Simulation complete!")
\ No newline at end of file